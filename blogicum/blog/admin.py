@@ -1,6 +1,9 @@
 from django.contrib import admin
+from django.utils import timezone
 
-from .models import Category, Comment, Location, Post
+from core.cache import bump_version
+from core.service import sync_category_posts_visibility
+from .models import Category, Comment, ImageJob, Location, MediaBlob, Post
 
 admin.site.empty_value_display = 'Не задано'
 
@@ -43,6 +46,25 @@ class CategoryAdmin(admin.ModelAdmin):
         'is_published',
         'created_at',
     )
+    actions = ('publish', 'unpublish')
+
+    @admin.action(description='Опубликовать выбранные категории')
+    def publish(self, request, queryset):
+        queryset.update(is_published=True, updated_at=timezone.now())
+        sync_category_posts_visibility(queryset)
+        bump_version('feed')
+        bump_version('category')
+        bump_version('post')
+        bump_version('pages')
+
+    @admin.action(description='Снять с публикации выбранные категории')
+    def unpublish(self, request, queryset):
+        queryset.update(is_published=False, updated_at=timezone.now())
+        sync_category_posts_visibility(queryset)
+        bump_version('feed')
+        bump_version('category')
+        bump_version('post')
+        bump_version('pages')
 
 
 @admin.register(Location)
@@ -57,3 +79,26 @@ class LocationAdmin(admin.ModelAdmin):
 @admin.register(Comment)
 class CommentAdmin(admin.ModelAdmin):
     pass
+
+
+@admin.register(ImageJob)
+class ImageJobAdmin(admin.ModelAdmin):
+    list_display = (
+        'image',
+        'post',
+        'status',
+        'attempts',
+        'updated_at',
+    )
+    list_filter = ('status',)
+    readonly_fields = ('error',)
+
+
+@admin.register(MediaBlob)
+class MediaBlobAdmin(admin.ModelAdmin):
+    list_display = (
+        'name',
+        'refcount',
+        'created_at',
+    )
+    search_fields = ('name',)
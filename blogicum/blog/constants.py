@@ -1,2 +1,49 @@
 # Количество отображаемых на странице постов
 PAGINATOR_COUNT = 10
+
+# Время жизни закешированного количества постов в ленте, секунды
+FEED_COUNT_CACHE_TIMEOUT = 60 * 5
+
+# Количество слов текста поста в анонсе на карточке ленты
+EXCERPT_WORDS = 10
+
+# Максимальная длина анонса в символах
+EXCERPT_MAX_LENGTH = 512
+
+# Время жизни закешированной категории, секунды
+CATEGORY_CACHE_TIMEOUT = 60 * 60
+
+# Время жизни закешированного поста для страницы публикации, секунды
+POST_CACHE_TIMEOUT = 60 * 60
+
+# Количество комментариев, подгружаемых на страницу поста за один раз
+COMMENTS_PAGINATOR_COUNT = 50
+
+# Размеры уменьшенных копий изображения поста (ширина, высота):
+# карточка ленты, страница поста, карточка на экранах высокой плотности
+THUMBNAIL_SIZES = {
+    'card': (640, 640),
+    'detail': (960, 960),
+    'retina': (1280, 1280),
+}
+
+# Качество JPEG уменьшенных копий
+THUMBNAIL_QUALITY = 85
+
+# Качество JPEG оригинала, перекодированного без EXIF
+ORIGINAL_QUALITY = 95
+
+# Заглушка на месте ещё не готовой уменьшенной копии (статический файл)
+IMAGE_PLACEHOLDER = 'img/placeholder.svg'
+IMAGE_PLACEHOLDER_SIZE = (640, 360)
+
+# Файлы моложе этого срока сборщик медиафайлов не трогает: загрузка
+# могла ещё не дойти до сохранения поста, секунды
+MEDIA_GC_GRACE_PERIOD = 60 * 60
+
+# Время хранения изображений видимых постов в кешах браузера и прокси,
+# секунды
+MEDIA_CACHE_TIMEOUT = 60 * 60 * 24
+
+# Наибольшая сторона копии, создаваемой по запросу media/resize/, пиксели
+RESIZE_MAX_SIZE = 2560
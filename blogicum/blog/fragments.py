@@ -0,0 +1,86 @@
+import re
+from urllib.parse import parse_qsl, urlencode
+
+from django.template.loader import render_to_string
+from django.urls import reverse
+from django.utils.html import escape
+
+from blog.forms import CreateCommentForm
+
+FRAGMENTS = {}
+MARKER_RE = re.compile(r'<!--personal:(\w+)\?([^>]*?)-->')
+
+
+def fragment(template_name):
+    """Регистрация персонального фрагмента страницы."""
+    def decorator(func):
+        FRAGMENTS[func.__name__] = (template_name, func)
+        return func
+    return decorator
+
+
+def is_current_user(request, user_id):
+    return str(request.user.pk) == str(user_id)
+
+
+@fragment('includes/header.html')
+def header(request, view_name=''):
+    return {'view_name': view_name}
+
+
+@fragment('includes/comment_form.html')
+def comment_form(request, post_id):
+    return {'post_id': post_id, 'form': CreateCommentForm()}
+
+
+@fragment('includes/post_controls.html')
+def post_controls(request, post_id, author_id):
+    return {
+        'post_id': post_id,
+        'is_author': is_current_user(request, author_id),
+    }
+
+
+@fragment('includes/comment_controls.html')
+def comment_controls(request, post_id, comment_id, author_id):
+    return {
+        'post_id': post_id,
+        'comment_id': comment_id,
+        'is_author': is_current_user(request, author_id),
+    }
+
+
+def render_fragment(request, name, params):
+    """HTML персонального фрагмента для текущего пользователя.
+
+    KeyError — неизвестный фрагмент, TypeError — неверные параметры.
+    """
+    template_name, get_context = FRAGMENTS[name]
+    return render_to_string(
+        template_name, get_context(request, **params), request
+    )
+
+
+def make_marker(name, params):
+    """Метка на месте фрагмента в общей для всех копии страницы."""
+    return f'<!--personal:{name}?{urlencode(params)}-->'
+
+
+def expand_markers(request, content):
+    """Подстановка фрагментов текущего пользователя вместо меток."""
+    return MARKER_RE.sub(
+        lambda match: render_fragment(
+            request, match[1], dict(parse_qsl(match[2]))
+        ),
+        content
+    )
+
+
+def markers_to_edge_includes(content):
+    """Замена меток на <esi:include> для сборки страницы на прокси."""
+    return MARKER_RE.sub(
+        lambda match: '<esi:include src="{}"/>'.format(escape(
+            reverse('blog:fragment', args=[match[1]]) + '?' + match[2]
+        )),
+        content
+    )
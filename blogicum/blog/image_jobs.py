@@ -0,0 +1,94 @@
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import close_old_connections, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from blog.models import ImageJob
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+
+
+def enqueue_image_job(post):
+    """Постановка изображения поста в очередь на обработку.
+
+    Задача хранится в БД и переживает перезапуск; обработчику она
+    передаётся после фиксации транзакции с постом.
+    """
+    job = ImageJob.objects.create(post=post, image=post.image.name)
+    transaction.on_commit(lambda: submit_image_job(job.pk))
+    return job
+
+
+def submit_image_job(job_id):
+    """Передача задачи пулу потоков, а без него — выполнение сразу."""
+    if _pool is None:
+        return run_image_job(job_id)
+    _pool.submit(_run_in_worker, job_id)
+
+
+def run_image_job(job_id):
+    """Выполнение задачи, если её ещё не взял другой обработчик."""
+    claimed = ImageJob.objects.filter(
+        pk=job_id, status=ImageJob.Status.PENDING
+    ).update(
+        status=ImageJob.Status.RUNNING,
+        attempts=F('attempts') + 1,
+        updated_at=timezone.now()
+    )
+    if not claimed:
+        return False
+    job = ImageJob.objects.select_related('post').get(pk=job_id)
+    try:
+        # Изображение поста успели заменить: им займётся новая задача.
+        if job.post.image.name == job.image:
+            job.post.process_image()
+    except Exception as error:
+        logger.exception('Не удалось обработать изображение %s', job.image)
+        job.status = ImageJob.Status.FAILED
+        job.error = repr(error)
+    else:
+        job.status = ImageJob.Status.DONE
+        job.error = ''
+    job.save(update_fields=('status', 'error', 'updated_at'))
+    return job.status == ImageJob.Status.DONE
+
+
+def _run_in_worker(job_id):
+    try:
+        run_image_job(job_id)
+    finally:
+        close_old_connections()
+
+
+def _resume_pending_jobs():
+    try:
+        pending = list(ImageJob.objects.filter(
+            status=ImageJob.Status.PENDING
+        ).values_list('pk', flat=True))
+    except Exception:
+        logger.exception('Не удалось прочитать очередь изображений')
+        return
+    finally:
+        close_old_connections()
+    for job_id in pending:
+        _pool.submit(_run_in_worker, job_id)
+
+
+def start_image_workers():
+    """Запуск пула обработчиков, если задан IMAGE_WORKERS.
+
+    Оставшиеся в очереди с прошлого запуска задачи передаются пулу.
+    """
+    global _pool
+    if settings.IMAGE_WORKERS and _pool is None:
+        _pool = ThreadPoolExecutor(
+            max_workers=settings.IMAGE_WORKERS,
+            thread_name_prefix='image-worker'
+        )
+        _pool.submit(_resume_pending_jobs)
+    return _pool
@@ -0,0 +1,106 @@
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from blog.constants import THUMBNAIL_SIZES
+from blog.models import Post
+from core.cache import bump_version
+from core.images import MODERN_FORMATS, read_image_meta, variant_name
+
+
+def read_post_image_meta(post):
+    """Сведения об оригинале и уже созданных копиях изображения поста."""
+    storage = post.image.storage
+    with storage.open(post.image.name, 'rb') as file:
+        meta = read_image_meta(file)
+    variants = {}
+    for variant in THUMBNAIL_SIZES:
+        name = variant_name(post.image.name, variant)
+        if not storage.exists(name):
+            return meta
+        with storage.open(name, 'rb') as file:
+            variant_meta = read_image_meta(file)
+        variants[variant] = [variant_meta['width'], variant_meta['height']]
+    meta['variants'] = variants
+    meta['formats'] = [
+        image_format for image_format, (ext, _) in MODERN_FORMATS.items()
+        if all(
+            storage.exists(variant_name(post.image.name, variant, ext))
+            for variant in THUMBNAIL_SIZES
+        )
+    ]
+    return meta
+
+
+class Command(BaseCommand):
+    help = (
+        'Заполняет сведения об изображениях существующих постов, '
+        'читая файлы в несколько потоков.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перечитать сведения у всех постов, а не только у пустых.'
+        )
+        parser.add_argument(
+            '--workers',
+            type=int,
+            default=4,
+            help='Количество потоков чтения файлов.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество постов, читаемых и записываемых за один проход.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').only(
+            'image', 'image_meta'
+        ).order_by('pk')
+        if not options['all']:
+            posts = posts.exclude(image_meta__has_key='sha256')
+        posts = posts.iterator(chunk_size=options['batch_size'])
+        updated = failed = 0
+        with ThreadPoolExecutor(max_workers=options['workers']) as pool:
+            while True:
+                batch = list(islice(posts, options['batch_size']))
+                if not batch:
+                    break
+                saved = self.save_batch(
+                    batch, pool.map(self.read_meta, batch)
+                )
+                updated += saved
+                failed += len(batch) - saved
+        self.stdout.write(self.style.SUCCESS(
+            f'Обновлено постов: {updated}, ошибок: {failed}'
+        ))
+
+    @staticmethod
+    def save_batch(posts, results):
+        """Запись прочитанных сведений порции постов; их количество."""
+        now = timezone.now()
+        batch = []
+        for post, meta in zip(posts, results):
+            if meta is not None:
+                post.image_meta = meta
+                post.updated_at = now
+                batch.append(post)
+        if batch:
+            Post.objects.bulk_update(batch, ('image_meta', 'updated_at'))
+            # bulk_update не посылает сигналы: сброс кешей постов и страниц.
+            bump_version('post')
+            bump_version('pages')
+        return len(batch)
+
+    def read_meta(self, post):
+        try:
+            return read_post_image_meta(post)
+        except OSError as error:
+            self.stderr.write(f'Пост {post.pk}: {error}')
+            return None
@@ -0,0 +1,145 @@
+import os
+import time
+from functools import reduce
+from itertools import islice
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+
+from blog.constants import MEDIA_GC_GRACE_PERIOD, THUMBNAIL_SIZES
+from blog.models import MediaBlob, Post
+from core.images import original_root
+from core.storage import media_storage
+
+# Каталог изображений постов внутри MEDIA_ROOT
+IMAGES_DIR = 'posts_images'
+
+# Количество префиксов в одном запросе к blog_post.image
+QUERY_CHUNK_SIZE = 100
+
+
+def walk_files(root, prefix):
+    """Файлы каталога root/prefix с подкаталогами: (имя, DirEntry).
+
+    Каталоги читаются os.scandir по мере обхода, список всех файлов
+    в памяти не собирается.
+    """
+    stack = [prefix]
+    while stack:
+        directory = stack.pop()
+        try:
+            entries = os.scandir(os.path.join(root, directory))
+        except FileNotFoundError:
+            continue
+        with entries:
+            for entry in entries:
+                name = f'{directory}/{entry.name}'
+                if entry.is_dir(follow_symlinks=False):
+                    stack.append(name)
+                elif entry.is_file(follow_symlinks=False):
+                    yield name, entry
+
+
+def image_root(name):
+    """Общее имя оригинала изображения поста и его копий."""
+    return original_root(name, THUMBNAIL_SIZES)
+
+
+def roots_condition(roots, field):
+    """Условие «имя начинается с одного из roots» для поля field."""
+    return reduce(or_, (
+        Q(**{f'{field}__startswith': f'{root}.'}) for root in roots
+    ))
+
+
+def batch_references(roots):
+    """Ссылки на оригиналы roots: (используемые, учтённые в MediaBlob).
+
+    Используемые — на них ссылается пост или незавершённая загрузка
+    (MediaBlob со ссылками). Вторые — корни, у оригинала которых есть
+    запись MediaBlob: их удаляет MediaBlob.collect под блокировкой.
+    """
+    roots = list(roots)
+    referenced = set()
+    blobs = {}
+    for start in range(0, len(roots), QUERY_CHUNK_SIZE):
+        chunk = roots[start:start + QUERY_CHUNK_SIZE]
+        referenced.update(
+            image_root(name)
+            for name in Post.objects.filter(
+                roots_condition(chunk, 'image')
+            ).values_list('image', flat=True)
+        )
+        for name, refcount in MediaBlob.objects.filter(
+            roots_condition(chunk, 'name')
+        ).values_list('name', 'refcount'):
+            blobs[image_root(name)] = name
+            if refcount:
+                referenced.add(image_root(name))
+    return referenced, blobs
+
+
+class Command(BaseCommand):
+    help = (
+        'Обходит каталог изображений постов и удаляет файлы, '
+        'на которые не ссылается ни один пост.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие файлы будут удалены.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=1000,
+            help='Количество файлов, проверяемых за один проход.'
+        )
+        parser.add_argument(
+            '--grace-period',
+            type=int,
+            default=MEDIA_GC_GRACE_PERIOD,
+            help='Не трогать файлы моложе этого срока, секунды.'
+        )
+
+    def handle(self, *args, **options):
+        files = walk_files(media_storage.location, IMAGES_DIR)
+        deadline = time.time() - options['grace_period']
+        checked = removed = freed = 0
+        while True:
+            batch = list(islice(files, options['batch_size']))
+            if not batch:
+                break
+            checked += len(batch)
+            referenced, blobs = batch_references({
+                image_root(name) for name, _ in batch
+            })
+            for name, entry in batch:
+                root = image_root(name)
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except FileNotFoundError:
+                    # Удалён вместе со своим оригиналом.
+                    continue
+                if root in referenced or stat.st_mtime > deadline:
+                    continue
+                if root in blobs:
+                    # Оригинал с копиями удаляется под блокировкой записи
+                    # MediaBlob, которую берёт и новая загрузка.
+                    if name != blobs[root] or not (
+                        options['dry_run'] or MediaBlob.collect(name)
+                    ):
+                        continue
+                elif not options['dry_run']:
+                    media_storage.delete(name)
+                self.stdout.write(name)
+                removed += 1
+                freed += stat.st_size
+        action = 'Будет удалено' if options['dry_run'] else 'Удалено'
+        self.stdout.write(self.style.SUCCESS(
+            f'Проверено файлов: {checked}. {action} файлов без ссылок: '
+            f'{removed}, {freed} байт'
+        ))
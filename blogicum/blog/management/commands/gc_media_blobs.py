@@ -0,0 +1,30 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import MediaBlob, Post
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы изображений, на которые не ссылается ни один пост.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Только показать, какие файлы будут удалены.'
+        )
+
+    def handle(self, *args, **options):
+        orphans = MediaBlob.objects.filter(refcount=0).exclude(
+            name__in=Post.objects.values('image')
+        )
+        removed = 0
+        for blob in orphans.iterator():
+            if options['dry_run']:
+                self.stdout.write(blob.name)
+                removed += 1
+                continue
+            if MediaBlob.collect(blob.name):
+                removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов без ссылок: {removed}'
+        ))
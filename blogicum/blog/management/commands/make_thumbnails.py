@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Создаёт уменьшенные копии изображений существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--force',
+            action='store_true',
+            help='Пересоздать копии, даже если они уже есть.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image='').order_by('pk')
+        created = failed = 0
+        for post in posts.iterator():
+            if not options['force'] and 'variants' in post.image_meta:
+                continue
+            try:
+                post.process_image(reuse=not options['force'])
+            except OSError as error:
+                failed += 1
+                self.stderr.write(f'Пост {post.pk}: {error}')
+                continue
+            created += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Созданы копии для постов: {created}, ошибок: {failed}'
+        ))
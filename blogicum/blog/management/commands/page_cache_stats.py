@@ -0,0 +1,16 @@
+from django.core.management.base import BaseCommand
+
+from blog.middleware import get_page_cache_stats
+
+
+class Command(BaseCommand):
+    help = 'Показывает попадания и промахи кеша страниц.'
+
+    def handle(self, *args, **options):
+        hits, misses = get_page_cache_stats()
+        total = hits + misses
+        ratio = hits / total * 100 if total else 0
+        self.stdout.write(
+            f'Попаданий: {hits}, промахов: {misses}, доля попаданий: '
+            f'{ratio:.1f}%'
+        )
@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from blog.image_jobs import run_image_job
+from blog.models import ImageJob
+
+
+class Command(BaseCommand):
+    help = 'Выполняет задачи из очереди обработки изображений постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--retry',
+            action='store_true',
+            help=(
+                'Вернуть в очередь задачи с ошибкой и зависшие после '
+                'аварийной остановки сервера.'
+            )
+        )
+
+    def handle(self, *args, **options):
+        if options['retry']:
+            requeued = ImageJob.objects.filter(status__in=(
+                ImageJob.Status.FAILED, ImageJob.Status.RUNNING
+            )).update(status=ImageJob.Status.PENDING)
+            self.stdout.write(f'Возвращено в очередь задач: {requeued}')
+        pending = ImageJob.objects.filter(
+            status=ImageJob.Status.PENDING
+        ).values_list('pk', flat=True)
+        done = failed = 0
+        for job_id in list(pending):
+            if run_image_job(job_id):
+                done += 1
+            elif ImageJob.objects.filter(
+                pk=job_id, status=ImageJob.Status.FAILED
+            ).exists():
+                failed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Выполнено задач: {done}, с ошибкой: {failed}'
+        ))
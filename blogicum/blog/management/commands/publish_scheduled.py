@@ -0,0 +1,59 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from blog.models import Post
+from blog.publication import posts_updated, publish_scheduled_posts
+
+
+class Command(BaseCommand):
+    help = 'Публикует отложенные посты, дата публикации которых наступила.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--interval',
+            type=int,
+            help='Повторять проверку каждые N секунд.'
+        )
+        parser.add_argument(
+            '--full',
+            action='store_true',
+            help='Пересчитать видимость всех постов.'
+        )
+
+    def handle(self, *args, **options):
+        if options['full']:
+            self.resync_visibility()
+        while True:
+            published = publish_scheduled_posts()
+            if published:
+                self.stdout.write(f'Опубликовано постов: {published}')
+            if not options['interval']:
+                return
+            time.sleep(options['interval'])
+
+    def resync_visibility(self):
+        visible = Q(
+            is_published=True,
+            category__is_published=True,
+            pub_date__lte=timezone.now()
+        )
+        hidden = list(Post.objects.filter(is_visible=True).exclude(
+            visible
+        ).values_list('pk', flat=True))
+        shown = list(Post.objects.filter(
+            visible, is_visible=False
+        ).values_list('pk', flat=True))
+        now = timezone.now()
+        Post.objects.filter(pk__in=hidden).update(
+            is_visible=False, updated_at=now
+        )
+        Post.objects.filter(pk__in=shown).update(
+            is_visible=True, updated_at=now
+        )
+        changed = len(hidden) + len(shown)
+        if changed:
+            posts_updated.send(sender=Post, post_ids=hidden + shown)
+        self.stdout.write(f'Исправлена видимость постов: {changed}')
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from blog.models import Comment, Post
+from blog.publication import posts_updated
+
+
+class Command(BaseCommand):
+    help = 'Сверяет счётчики комментариев публикаций с таблицей комментариев.'
+
+    def handle(self, *args, **options):
+        actual_count = Coalesce(
+            Subquery(
+                Comment.objects.filter(post=OuterRef('pk'))
+                .order_by()
+                .values('post')
+                .annotate(total=Count('pk'))
+                .values('total'),
+                output_field=IntegerField()
+            ),
+            0
+        )
+        stale = Post.objects.annotate(
+            actual_count=actual_count
+        ).exclude(comment_count=F('actual_count')).values_list('pk', flat=True)
+        post_ids = list(stale)
+        updated = Post.objects.filter(pk__in=post_ids).update(
+            comment_count=actual_count,
+            updated_at=timezone.now()
+        )
+        if post_ids:
+            posts_updated.send(sender=Post, post_ids=post_ids)
+        self.stdout.write(
+            self.style.SUCCESS(f'Исправлено счётчиков: {updated}')
+        )
@@ -0,0 +1,43 @@
+from django.core.management.base import BaseCommand
+
+from blog.models import Post
+
+
+class Command(BaseCommand):
+    help = 'Заполняет готовый HTML текста у существующих постов.'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--all',
+            action='store_true',
+            help='Перестроить HTML у всех постов, а не только у пустых.'
+        )
+        parser.add_argument(
+            '--batch-size',
+            type=int,
+            default=500,
+            help='Количество постов, обновляемых одним запросом.'
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.only('text', 'text_html').order_by('pk')
+        if not options['all']:
+            posts = posts.filter(text_html='')
+        batch = []
+        rendered = 0
+        for post in posts.iterator(chunk_size=options['batch_size']):
+            post.text_html = post.compute_text_html()
+            batch.append(post)
+            if len(batch) == options['batch_size']:
+                rendered += self.flush(batch)
+        rendered += self.flush(batch)
+        self.stdout.write(
+            self.style.SUCCESS(f'Обновлено постов: {rendered}')
+        )
+
+    @staticmethod
+    def flush(batch):
+        count = len(batch)
+        Post.objects.bulk_update(batch, ('text_html',))
+        batch.clear()
+        return count
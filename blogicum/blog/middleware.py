@@ -0,0 +1,172 @@
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+from django.urls import Resolver404, resolve
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import parse_http_date_safe
+
+from blog.fragments import expand_markers, markers_to_edge_includes
+from blog.publication import get_cache_timeout
+from core.cache import get_versions
+
+PAGE_CACHE_NAMESPACES = ('blog', 'pages')
+PAGE_CACHE_HITS_KEY = 'page-cache:hits'
+PAGE_CACHE_MISSES_KEY = 'page-cache:misses'
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+# Страницы, общая копия которых отдаётся и аутентифицированным
+SHARED_SHELL_VIEWS = (
+    'blog:index', 'blog:category_posts', 'blog:profile', 'blog:post_detail',
+    'blog:post_comments', 'pages:about', 'pages:rules',
+)
+
+
+def post_pages_namespace(post_id):
+    """Пространство кеша страниц одного поста."""
+    return f'pages:post:{post_id}'
+
+
+def _count(key):
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 1, None)
+
+
+def get_page_cache_stats():
+    """Количество попаданий и промахов кеша страниц."""
+    stats = cache.get_many((PAGE_CACHE_HITS_KEY, PAGE_CACHE_MISSES_KEY))
+    return (
+        stats.get(PAGE_CACHE_HITS_KEY, 0),
+        stats.get(PAGE_CACHE_MISSES_KEY, 0),
+    )
+
+
+class AnonymousPageCacheMiddleware:
+    """Кеш целых страниц блога для неаутентифицированных посетителей.
+
+    Ключ страницы включает версии пространств, от которых она зависит:
+    общего (пользователи, категории, местоположения), лент или одного
+    поста. Сигналы моделей меняют эти версии — см. blog.signals.
+
+    С PAGE_CACHE_SHARED_SHELL в кеш попадает общая копия страницы
+    с метками вместо персональных фрагментов (шапка, форма комментария,
+    кнопки автора — см. blog.fragments). Метки заменяются фрагментами
+    текущего пользователя при каждом ответе, поэтому из кеша обслуживаются
+    и аутентифицированные пользователи.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        namespaces = self.get_namespaces(request)
+        if namespaces is None:
+            return self.get_response(request)
+        key = self.get_cache_key(request, namespaces)
+        cached = cache.get(key)
+        if cached is not None:
+            _count(PAGE_CACHE_HITS_KEY)
+            content, content_type, validators = cached
+            response = HttpResponse(content, content_type=content_type)
+            for header, value in validators.items():
+                response[header] = value
+            response = get_conditional_response(
+                request,
+                etag=validators.get('ETag'),
+                last_modified=parse_http_date_safe(
+                    validators.get('Last-Modified')
+                ),
+                response=response
+            )
+            response['X-Page-Cache'] = 'HIT'
+        else:
+            _count(PAGE_CACHE_MISSES_KEY)
+            request.personal_markers = settings.PAGE_CACHE_SHARED_SHELL
+            response = self.get_response(request)
+            if self.is_cacheable(request, response):
+                cache.set(
+                    key,
+                    (
+                        response.content,
+                        response['Content-Type'],
+                        self.get_validators(response),
+                    ),
+                    get_cache_timeout(settings.PAGE_CACHE_TIMEOUT)
+                )
+            response['X-Page-Cache'] = 'MISS'
+        if settings.PAGE_CACHE_SHARED_SHELL:
+            self.personalize(request, response)
+        patch_vary_headers(response, ('Cookie',))
+        return response
+
+    @staticmethod
+    def get_validators(response):
+        """Валидаторы ETag и Last-Modified для ответов из кеша.
+
+        Общая копия страницы отдаётся разным пользователям, а ETag
+        зависит от пользователя, поэтому для неё валидаторы не хранятся.
+        """
+        if settings.PAGE_CACHE_SHARED_SHELL:
+            return {}
+        return {
+            header: response[header]
+            for header in VALIDATOR_HEADERS if response.has_header(header)
+        }
+
+    @staticmethod
+    def personalize(request, response):
+        """Замена меток персональных фрагментов в ответе."""
+        if (response.streaming
+                or not response.get('Content-Type', '').startswith(
+                    'text/html')):
+            return
+        content = response.content.decode(response.charset)
+        if settings.PAGE_CACHE_EDGE_INCLUDES:
+            content = markers_to_edge_includes(content)
+            response['Surrogate-Control'] = 'content="ESI/1.0"'
+        else:
+            content = expand_markers(request, content)
+        response.content = content
+
+    @staticmethod
+    def get_namespaces(request):
+        """Пространства кеша страницы или None, если её не кешировать."""
+        if (not settings.PAGE_CACHE_TIMEOUT
+                or request.method not in ('GET', 'HEAD')
+                or 'messages' in request.COOKIES):
+            return None
+        try:
+            match = resolve(request.path_info)
+        except Resolver404:
+            return None
+        if match.namespace not in PAGE_CACHE_NAMESPACES:
+            return None
+        if request.user.is_authenticated and (
+            not settings.PAGE_CACHE_SHARED_SHELL
+            or match.view_name not in SHARED_SHELL_VIEWS
+            or match.kwargs.get('username') == request.user.get_username()
+        ):
+            return None
+        if 'post_id' in match.kwargs:
+            return ('pages', post_pages_namespace(match.kwargs['post_id']))
+        if match.namespace == 'blog':
+            return ('pages', 'pages:feed')
+        return ('pages',)
+
+    @staticmethod
+    def get_cache_key(request, namespaces):
+        path = hashlib.md5(request.get_full_path().encode()).hexdigest()
+        versions = ':'.join(map(str, get_versions(*namespaces)))
+        return f'page:{versions}:{path}'
+
+    @staticmethod
+    def is_cacheable(request, response):
+        return (
+            request.method == 'GET'
+            and response.status_code == 200
+            and not response.streaming
+            and not response.cookies
+            and 'private' not in response.get('Cache-Control', '')
+        )
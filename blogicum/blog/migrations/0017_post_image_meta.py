@@ -0,0 +1,18 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:34
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0016_imagejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='image_meta',
+            field=models.JSONField(default=dict, editable=False, help_text='Размеры, объём, MIME-тип и SHA-256 оригинала, размеры и форматы готовых копий.', verbose_name='Сведения об изображении'),
+        ),
+    ]
@@ -0,0 +1,48 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:36
+
+import blog.models
+import core.storage
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_media_blobs(apps, schema_editor):
+    Post = apps.get_model('blog', 'Post')
+    MediaBlob = apps.get_model('blog', 'MediaBlob')
+    references = Post.objects.exclude(image='').values('image').annotate(
+        total=Count('pk')
+    ).order_by()
+    MediaBlob.objects.bulk_create(
+        MediaBlob(name=row['image'], refcount=row['total'])
+        for row in references
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0017_post_image_meta'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='MediaBlob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=255, unique=True, verbose_name='Имя файла')),
+                ('refcount', models.PositiveIntegerField(default=0, verbose_name='Количество ссылок')),
+                ('created_at', models.DateTimeField(auto_now_add=True, verbose_name='Добавлено')),
+            ],
+            options={
+                'verbose_name': 'файл',
+                'verbose_name_plural': 'Файлы',
+                'ordering': ('name',),
+            },
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, storage=core.storage.ContentAddressedStorage(), upload_to=blog.models.post_image_path, verbose_name='Изображениe'),
+        ),
+        migrations.RunPython(fill_media_blobs, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 3.2.16 on 2026-10-18 02:58
+
+import blog.models
+import core.storage
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('blog', '0018_mediablob'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, db_index=True, storage=core.storage.ContentAddressedStorage(), upload_to=blog.models.post_image_path, verbose_name='Изображениe'),
+        ),
+    ]
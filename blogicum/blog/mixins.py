@@ -1,31 +1,192 @@
+import hashlib
+
+from django.conf import settings
 from django.contrib.auth.mixins import LoginRequiredMixin, UserPassesTestMixin
+from django.core.paginator import InvalidPage
+from django.core.cache import cache
+from django.db.models import BooleanField, Count, ExpressionWrapper, Max, Q
+from django.http import Http404
 from django.shortcuts import redirect
 from django.urls import reverse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.functional import cached_property
+from django.utils.http import http_date, quote_etag
 from django.views.generic import ListView
 
-from blog.constants import PAGINATOR_COUNT
+from blog.constants import (
+    COMMENTS_PAGINATOR_COUNT, FEED_COUNT_CACHE_TIMEOUT, PAGINATOR_COUNT
+)
 from blog.forms import CreatePostForm
 from blog.models import Comment, Post
-from core.service import get_published_post_list
-
-
-class ListPostsMixin(ListView):
+from blog.publication import publish_due_posts
+from core.cache import get_version, get_versions, versioned_key
+from core.identity_map import get_identity_map
+from core.pagination import FeedPaginator
+from core.service import get_post_detail, get_published_post_list
+
+
+class ConditionalGetMixin:
+    """Ответ 304 Not Modified без отрисовки страницы.
+
+    ETag складывается из get_etag_parts(), версии общих данных страниц
+    (пользователи, категории, местоположения) и текущего пользователя,
+    от которого зависят шапка и кнопки автора.
+    """
+
+    def get_etag_parts(self):
+        return ()
+
+    def get_last_modified(self):
+        return None
+
+    def get(self, request, *args, **kwargs):
+        etag = quote_etag(hashlib.md5(repr((
+            request.user.pk, get_version('pages'), *self.get_etag_parts()
+        )).encode()).hexdigest())
+        last_modified = self.get_last_modified()
+        timestamp = last_modified and int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if response is None:
+            response = super().get(request, *args, **kwargs)
+        response['ETag'] = etag
+        if timestamp:
+            response['Last-Modified'] = http_date(timestamp)
+        return response
+
+
+class ListPostsMixin(ConditionalGetMixin, ListView):
     """Формирование списка постов."""
 
     model = Post
     template_name = 'blog/index.html'
     paginate_by = PAGINATOR_COUNT
+    paginator_class = FeedPaginator
+    cursor_ordering = ('-pub_date', '-id')
 
     def get_queryset(self):
         return get_published_post_list()
 
+    def get_feed_key(self):
+        """Ключ ленты, под которым кешируется количество её постов."""
+        return self.request.path
+
+    @cached_property
+    def feed_state(self):
+        """Время последнего изменения и число постов ленты через кеш.
+
+        Ключ устаревает вместе с версиями лент: их меняют правки постов,
+        категорий, комментариев и отложенная публикация.
+        """
+        publish_due_posts()
+        versions = ':'.join(map(str, get_versions('feed', 'pages:feed')))
+        key = f'feed-state:{versions}:{self.get_feed_key()}'
+        state = cache.get(key)
+        if state is None:
+            state = self.get_queryset().aggregate(
+                last_modified=Max('updated_at'), count=Count('pk')
+            )
+            cache.set(key, state, FEED_COUNT_CACHE_TIMEOUT)
+        return state
+
+    def get_etag_parts(self):
+        """Части ETag ленты; Last-Modified у ленты нет.
+
+        Max(updated_at) не меняется, когда пост покидает ленту,
+        а число её постов в ETag — меняется.
+        """
+        return (self.feed_state['last_modified'], self.feed_state['count'])
+
+    def get_paginator(self, queryset, per_page, **kwargs):
+        return super().get_paginator(
+            queryset,
+            per_page,
+            ordering=self.cursor_ordering,
+            count_key=versioned_key('feed', 'count', self.get_feed_key()),
+            count_timeout=FEED_COUNT_CACHE_TIMEOUT,
+            approximate_threshold=settings.FEED_COUNT_APPROXIMATE_THRESHOLD,
+            **kwargs
+        )
+
+    def paginate_queryset(self, queryset, page_size):
+        """Переход по курсору ?cursor=, иначе по номеру страницы."""
+        cursor = self.request.GET.get('cursor')
+        if not cursor:
+            return super().paginate_queryset(queryset, page_size)
+        paginator = self.get_paginator(queryset, page_size)
+        try:
+            page = paginator.cursor_page(cursor)
+        except InvalidPage as error:
+            raise Http404(str(error))
+        return paginator, page, page.object_list, page.has_other_pages()
+
+
+class PostCommentsMixin(ConditionalGetMixin):
+    """Пост, видимый пользователю, и постраничные комментарии к нему."""
+
+    model = Post
+    pk_url_kwarg = 'post_id'
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            publish_due_posts()
+            post = get_post_detail(self.kwargs['post_id'])
+            if post is None or not (
+                post.is_visible or post.author_id == self.request.user.pk
+            ):
+                raise Http404('Публикация не найдена.')
+            self._object = get_identity_map(self.request).add(post)
+        return self._object
+
+    def get_etag_parts(self):
+        post = self.get_object()
+        return (
+            post.updated_at,
+            post.category and post.category.updated_at,
+            post.location and post.location.updated_at,
+        )
+
+    def get_last_modified(self):
+        """Правки комментариев отражены в Post.updated_at."""
+        return max(filter(None, self.get_etag_parts()))
+
+    def get(self, request, *args, **kwargs):
+        response = super().get(request, *args, **kwargs)
+        if not self.get_object().is_visible:
+            # Неопубликованный пост видит только автор: не в общий кеш.
+            patch_cache_control(response, private=True)
+        return response
+
+    def get_comments_paginator(self):
+        return FeedPaginator(
+            self.object.comments.select_related('author'),
+            COMMENTS_PAGINATOR_COUNT,
+            ordering=('created_dt', 'id')
+        )
+
 
 class OnlyAuthorMixin(UserPassesTestMixin):
-    """Определение является ли пользователь автором публикации."""
+    """Определение является ли пользователь автором публикации.
+
+    Объект загружается один раз вместе с признаком авторства, посчитанным
+    в SQL, и переиспользуется проверкой доступа, формой и шаблоном.
+    """
+
+    def get_object(self, queryset=None):
+        if not hasattr(self, '_object'):
+            if queryset is None:
+                queryset = self.get_queryset()
+            self._object = super().get_object(queryset.annotate(
+                is_author=ExpressionWrapper(
+                    Q(author_id=self.request.user.pk),
+                    output_field=BooleanField()
+                )
+            ))
+        return self._object
 
     def test_func(self):
-        object = self.get_object()
-        return object.author == self.request.user
+        return self.get_object().is_author
 
     def handle_no_permission(self):
         return redirect('blog:post_detail', post_id=self.kwargs['post_id'])
@@ -48,7 +209,7 @@ class WorkCommentsMixin(LoginRequiredMixin, OnlyAuthorMixin):
     pk_url_kwarg = 'comment_id'
 
     def get_queryset(self):
-        return super().get_queryset().filter(author=self.request.user)
+        return super().get_queryset().filter(post_id=self.kwargs['post_id'])
 
     def get_success_url(self):
         return reverse('blog:post_detail', args=[self.kwargs['post_id']])
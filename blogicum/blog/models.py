@@ -1,12 +1,40 @@
+import hashlib
+
 from django.contrib.auth import get_user_model
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F, Q
 from django.urls import reverse
+from django.template.defaultfilters import linebreaksbr
+from django.templatetags.static import static
+from django.utils import timezone
+from django.utils.safestring import mark_safe
+from django.utils.text import Truncator
 
+from blog.constants import (
+    EXCERPT_MAX_LENGTH, EXCERPT_WORDS, IMAGE_PLACEHOLDER, ORIGINAL_QUALITY,
+    THUMBNAIL_QUALITY, THUMBNAIL_SIZES
+)
+from core.images import (
+    MODERN_FORMATS, make_variants, read_image_meta, strip_metadata,
+    supported_formats, variant_name
+)
 from core.models import PublishedCreatedModel
+from core.storage import content_addressed_name, media_storage
 
 User = get_user_model()
 
 
+def post_image_path(instance, filename):
+    """Путь изображения поста по SHA-256 содержимого из image_meta.
+
+    Одинаковые загрузки получают одно имя и хранятся одним файлом.
+    """
+    sha256 = instance.image_meta.get('sha256') or read_image_meta(
+        instance.image.file
+    )['sha256']
+    return content_addressed_name('posts_images', sha256, filename)
+
+
 class Category(PublishedCreatedModel):
     """Описание модели Категория."""
 
@@ -47,6 +75,17 @@ class Post(PublishedCreatedModel):
 
     title = models.CharField(max_length=50, verbose_name='Заголовок')
     text = models.TextField(verbose_name='Текст')
+    excerpt = models.CharField(
+        max_length=EXCERPT_MAX_LENGTH,
+        editable=False,
+        blank=True,
+        verbose_name='Анонс'
+    )
+    text_html = models.TextField(
+        editable=False,
+        blank=True,
+        verbose_name='Текст в HTML'
+    )
     pub_date = models.DateTimeField(
         verbose_name='Дата и время публикации',
         help_text=(
@@ -73,14 +112,53 @@ class Post(PublishedCreatedModel):
     )
     image = models.ImageField(
         verbose_name='Изображениe',
-        upload_to='posts_images',
-        blank=True)
+        upload_to=post_image_path,
+        storage=media_storage,
+        blank=True,
+        db_index=True)
+    is_visible = models.BooleanField(
+        default=False,
+        editable=False,
+        verbose_name='Виден в ленте',
+        help_text=(
+            'Пост и его категория опубликованы, '
+            'дата публикации наступила.')
+    )
+    comment_count = models.PositiveIntegerField(
+        default=0,
+        editable=False,
+        verbose_name='Количество комментариев'
+    )
+    image_meta = models.JSONField(
+        default=dict,
+        editable=False,
+        verbose_name='Сведения об изображении',
+        help_text=(
+            'Размеры, объём, MIME-тип и SHA-256 оригинала, '
+            'размеры и форматы готовых копий.')
+    )
 
     class Meta:
         verbose_name = 'публикация'
         verbose_name_plural = 'Публикации'
         ordering = ('-pub_date',)
         default_related_name = 'posts'
+        indexes = (
+            models.Index(
+                fields=('-pub_date', '-id'),
+                condition=Q(is_visible=True),
+                name='post_visible_feed_idx'
+            ),
+            models.Index(
+                fields=('category', '-pub_date', '-id'),
+                condition=Q(is_visible=True),
+                name='post_category_visible_idx'
+            ),
+            models.Index(
+                fields=('author', '-pub_date', '-id'),
+                name='post_author_feed_idx'
+            ),
+        )
 
     def __str__(self):
         return self.title
@@ -89,6 +167,140 @@ class Post(PublishedCreatedModel):
         """Получение ссылки на объект"""
         return reverse('blog:post_detail', args=[self.pk])
 
+    def save(self, *args, **kwargs):
+        try:
+            super().save(*args, **kwargs)
+        except Exception:
+            self.release_acquired_image()
+            raise
+
+    def release_acquired_image(self):
+        """Снятие ссылки на новый файл, если пост не удалось сохранить.
+
+        Ссылку берёт remember_image_upload до записи в БД, а учитывает
+        count_image_references после неё. В транзакции, которую ошибка
+        пометила к откату, ссылку снимет сам откат.
+        """
+        acquired = getattr(self, '_acquired_image', None)
+        self._acquired_image = None
+        if acquired and not transaction.get_connection().needs_rollback:
+            MediaBlob.change_refcount(acquired, -1)
+
+    @property
+    def card_version(self):
+        """Версия содержимого карточки поста для кеша её фрагмента."""
+        category = self.category
+        location = self.location
+        state = (
+            self.pk, self.updated_at, self.title, self.excerpt,
+            self.pub_date.isoformat(), self.is_published, self.image.name,
+            self.comment_count,
+            self.author.username,
+            category and (category.slug, category.title,
+                          category.is_published),
+            location and (location.name, location.is_published),
+        )
+        return hashlib.md5(repr(state).encode()).hexdigest()
+
+    def make_thumbnails(self):
+        """Уменьшенные копии изображения рядом с оригиналом и в WebP/AVIF.
+
+        Их размеры и форматы записываются в image_meta (без сохранения).
+        """
+        formats = supported_formats()
+        self.image_meta = {
+            **self.image_meta,
+            'variants': make_variants(
+                self.image, THUMBNAIL_SIZES, THUMBNAIL_QUALITY, formats
+            ),
+            'formats': formats,
+        }
+
+    def process_image(self, reuse=True):
+        """Очистка оригинала от EXIF и создание уменьшенных копий.
+
+        Файл без EXIF может быть общим с другими постами: тогда с reuse
+        берутся их готовые копии. Пост сохраняется, чтобы сбросить кеши
+        с заглушкой на месте копий.
+        """
+        update_fields = ['image_meta', 'updated_at']
+        stripped = strip_metadata(self.image, ORIGINAL_QUALITY)
+        if stripped is not None:
+            self.image_meta = read_image_meta(stripped)
+            # Ссылка берётся до записи файла, как и при загрузке.
+            self._acquired_image = self.image.field.generate_filename(
+                self, stripped.name
+            )
+            MediaBlob.change_refcount(self._acquired_image, 1)
+            try:
+                self.image.save(stripped.name, stripped, save=False)
+            except Exception:
+                self.release_acquired_image()
+                raise
+            update_fields.append('image')
+        processed = reuse and Post.objects.filter(
+            image=self.image.name, image_meta__has_key='variants'
+        ).exclude(pk=self.pk).values_list('image_meta', flat=True).first()
+        if processed:
+            self.image_meta = processed
+        else:
+            if stripped is None:
+                with self.image.open('rb'):
+                    self.image_meta = read_image_meta(self.image)
+            self.make_thumbnails()
+        self.save(update_fields=update_fields)
+
+    def image_variant_url(self, variant):
+        """Адрес уменьшенной копии; пока её нет — заглушка.
+
+        Наличие копии берётся из image_meta, без обращения к хранилищу.
+        """
+        if not self.image:
+            return ''
+        if variant in self.image_meta.get('variants', {}):
+            return self.image.storage.url(
+                variant_name(self.image.name, variant)
+            )
+        return static(IMAGE_PLACEHOLDER)
+
+    @property
+    def card_image_url(self):
+        return self.image_variant_url('card')
+
+    @property
+    def detail_image_url(self):
+        return self.image_variant_url('detail')
+
+    @property
+    def retina_image_url(self):
+        return self.image_variant_url('retina')
+
+    def compute_excerpt(self):
+        """Анонс для карточки — как у фильтра truncatewords.
+
+        Длина дополнительно ограничена EXCERPT_MAX_LENGTH символами:
+        анонс из очень длинных слов обрезается посреди слова.
+        """
+        excerpt = Truncator(self.text).words(EXCERPT_WORDS, truncate=' …')
+        return Truncator(excerpt).chars(EXCERPT_MAX_LENGTH)
+
+    def compute_text_html(self):
+        """Экранированный текст с переносами строк <br>."""
+        return linebreaksbr(self.text, autoescape=True)
+
+    @property
+    def text_as_html(self):
+        """Готовый HTML текста; для не заполненных строк — на лету."""
+        return mark_safe(self.text_html or self.compute_text_html())
+
+    def compute_is_visible(self):
+        """Видимость поста по его флагам, дате и флагу категории в БД."""
+        return (
+            self.is_published and self.pub_date <= timezone.now()
+        ) and Category.objects.filter(
+            pk=self.category_id, is_published=True
+        ).exists()
+
 
 class Comment(models.Model):
     """Описании модели Комментария к публикациям."""
@@ -114,7 +326,135 @@ class Comment(models.Model):
         verbose_name_plural = 'Комментарии'
         ordering = ('created_dt',)
         default_related_name = 'comments'
+        indexes = (
+            models.Index(
+                fields=('post', 'created_dt', 'id'),
+                name='comment_post_created_idx'
+            ),
+        )
 
     def __str__(self):
         return (f'Комментарий автора {self.author}'
                 f' к посту {self.post}, текст: {self.text}')
+
+
+class ImageJob(models.Model):
+    """Задача фоновой обработки изображения поста."""
+
+    class Status(models.TextChoices):
+        PENDING = 'pending', 'В очереди'
+        RUNNING = 'running', 'Выполняется'
+        DONE = 'done', 'Готово'
+        FAILED = 'failed', 'Ошибка'
+
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        verbose_name='Публикация'
+    )
+    image = models.CharField(max_length=255, verbose_name='Изображение')
+    status = models.CharField(
+        max_length=16,
+        choices=Status.choices,
+        default=Status.PENDING,
+        verbose_name='Состояние'
+    )
+    attempts = models.PositiveSmallIntegerField(
+        default=0,
+        verbose_name='Попыток'
+    )
+    error = models.TextField(blank=True, verbose_name='Ошибка')
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+    updated_at = models.DateTimeField(auto_now=True, verbose_name='Изменено')
+
+    class Meta:
+        verbose_name = 'задача обработки изображения'
+        verbose_name_plural = 'Задачи обработки изображений'
+        ordering = ('pk',)
+        default_related_name = 'image_jobs'
+        indexes = (
+            models.Index(fields=('status', 'id'), name='image_job_status_idx'),
+        )
+
+    def __str__(self):
+        return f'{self.image}: {self.get_status_display()}'
+
+
+class MediaBlob(models.Model):
+    """Файл в хранилище и количество постов, которые на него ссылаются.
+
+    Файлы без ссылок удаляет команда gc_media_blobs.
+    """
+
+    name = models.CharField(
+        max_length=255,
+        unique=True,
+        verbose_name='Имя файла'
+    )
+    refcount = models.PositiveIntegerField(
+        default=0,
+        verbose_name='Количество ссылок'
+    )
+    created_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name='Добавлено'
+    )
+
+    class Meta:
+        verbose_name = 'файл'
+        verbose_name_plural = 'Файлы'
+        ordering = ('name',)
+
+    def __str__(self):
+        return f'{self.name} ({self.refcount})'
+
+    @classmethod
+    def change_refcount(cls, name, delta):
+        """Изменение числа ссылок на файл хранилища на delta.
+
+        Ссылка берётся под блокировкой записи, которую держит и collect,
+        пока удаляет файлы. Поэтому новая загрузка либо защищает файл
+        от удаления, либо дожидается удаления и записывает файл заново.
+        """
+        if not name:
+            return
+        with transaction.atomic():
+            blobs = cls.objects.select_for_update().filter(name=name)
+            if delta > 0:
+                cls.objects.select_for_update().get_or_create(name=name)
+            else:
+                blobs = blobs.filter(refcount__gte=-delta)
+            blobs.update(refcount=F('refcount') + delta)
+
+    @classmethod
+    def collect(cls, name):
+        """Удаление файла без ссылок и его копий; False — на него сослались.
+
+        Запись и файлы удаляются в одной транзакции под блокировкой записи,
+        которую берёт change_refcount.
+        """
+        with transaction.atomic():
+            blob = cls.objects.select_for_update().filter(
+                name=name, refcount=0
+            ).first()
+            if blob is None:
+                return False
+            # В SQLite блокировку строки заменяет блокировка записи всей
+            # БД, поэтому запись удаляется до файлов.
+            blob.delete()
+            for file_name in blob.files:
+                if media_storage.exists(file_name):
+                    media_storage.delete(file_name)
+        return True
+
+    @property
+    def files(self):
+        """Файл и все его уменьшенные копии."""
+        extensions = [None] + [ext for ext, _ in MODERN_FORMATS.values()]
+        return [self.name] + [
+            variant_name(self.name, variant, ext)
+            for variant in THUMBNAIL_SIZES for ext in extensions
+        ]
@@ -0,0 +1,112 @@
+import logging
+import threading
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.db.models import Min
+from django.dispatch import Signal
+from django.utils import timezone
+
+from blog.models import Post
+
+logger = logging.getLogger(__name__)
+
+NEXT_PUBLICATION_KEY = 'blog:next-publication'
+
+# Отправляется после того, как отложенные посты стали видимыми;
+# аргумент post_ids — список их идентификаторов.
+posts_published = Signal()
+
+# Отправляется после изменения постов через QuerySet.update(), которое
+# не посылает post_save; аргумент post_ids — список их идентификаторов.
+posts_updated = Signal()
+
+
+def get_scheduled_posts():
+    """Посты, которые станут видимыми, когда наступит дата публикации."""
+    return Post.objects.filter(
+        is_visible=False,
+        is_published=True,
+        category__is_published=True
+    )
+
+
+def publish_scheduled_posts(now=None):
+    """Перевод в видимые постов, дата публикации которых наступила."""
+    post_ids = list(
+        get_scheduled_posts().filter(
+            pub_date__lte=now or timezone.now()
+        ).values_list('pk', flat=True)
+    )
+    if post_ids:
+        Post.objects.filter(pk__in=post_ids).update(
+            is_visible=True, updated_at=timezone.now()
+        )
+        posts_published.send(sender=Post, post_ids=post_ids)
+    cache.delete(NEXT_PUBLICATION_KEY)
+    return len(post_ids)
+
+
+def next_publication_time():
+    """Дата ближайшей отложенной публикации или None."""
+    next_time = cache.get(NEXT_PUBLICATION_KEY)
+    if next_time is None:
+        next_time = get_scheduled_posts().aggregate(
+            next_time=Min('pub_date'))['next_time'] or ''
+        cache.set(NEXT_PUBLICATION_KEY, next_time, None)
+    return next_time or None
+
+
+def publish_due_posts():
+    """Публикация наступивших постов; без запроса к БД, если их нет.
+
+    Возвращает количество опубликованных постов.
+    """
+    next_time = next_publication_time()
+    if next_time is not None and next_time <= timezone.now():
+        return publish_scheduled_posts()
+    return 0
+
+
+def get_cache_timeout(timeout):
+    """Время жизни кеша ленты, не превышающее срок до новой публикации."""
+    next_time = next_publication_time()
+    if next_time is None:
+        return timeout
+    seconds = int((next_time - timezone.now()).total_seconds()) + 1
+    return max(0, min(timeout, seconds))
+
+
+class PublicationScheduler(threading.Thread):
+    """Фоновый поток, периодически публикующий отложенные посты."""
+
+    def __init__(self, interval):
+        super().__init__(name='publication-scheduler', daemon=True)
+        self.interval = interval
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            try:
+                publish_scheduled_posts()
+            except Exception:
+                logger.exception('Не удалось опубликовать отложенные посты')
+            finally:
+                close_old_connections()
+
+    def stop(self):
+        self.stopped.set()
+
+
+_scheduler = None
+
+
+def start_publication_scheduler():
+    """Запуск планировщика, если задан PUBLICATION_SCHEDULER_INTERVAL."""
+    global _scheduler
+    interval = settings.PUBLICATION_SCHEDULER_INTERVAL
+    if interval and _scheduler is None:
+        _scheduler = PublicationScheduler(interval)
+        _scheduler.start()
+    return _scheduler
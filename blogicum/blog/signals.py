@@ -0,0 +1,259 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import F
+from django.db.models.signals import (
+    post_delete, post_init, post_save, pre_save
+)
+from django.dispatch import receiver
+from django.utils import timezone
+
+from blog.image_jobs import enqueue_image_job
+from blog.middleware import post_pages_namespace
+from blog.models import Category, Comment, Location, MediaBlob, Post
+from blog.publication import (
+    NEXT_PUBLICATION_KEY, posts_published, posts_updated
+)
+from core.cache import bump_version
+from core.images import read_image_meta
+from core.service import post_cache_key, sync_category_posts_visibility
+
+User = get_user_model()
+
+
+def change_comment_count(post_id, delta):
+    """Изменение счётчика комментариев публикации на delta."""
+    posts = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        posts = posts.filter(comment_count__gte=-delta)
+    posts.update(
+        comment_count=F('comment_count') + delta,
+        updated_at=timezone.now()
+    )
+
+
+@receiver(pre_save, sender=Comment)
+def remember_comment_post(sender, instance, raw, **kwargs):
+    """Запоминание публикации, к которой комментарий относился до правки."""
+    if raw or instance.pk is None:
+        return
+    instance._previous_post_id = Comment.objects.filter(
+        pk=instance.pk
+    ).values_list('post_id', flat=True).first()
+
+
+@receiver(post_save, sender=Comment)
+def count_saved_comment(sender, instance, created, raw, **kwargs):
+    """Учёт нового или перенесённого в другую публикацию комментария."""
+    if raw:
+        return
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if created:
+        change_comment_count(instance.post_id, 1)
+    elif previous_post_id not in (None, instance.post_id):
+        change_comment_count(previous_post_id, -1)
+        change_comment_count(instance.post_id, 1)
+    else:
+        # Правка текста: страница поста изменилась, см. Post.updated_at.
+        Post.objects.filter(pk=instance.post_id).update(
+            updated_at=timezone.now()
+        )
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, **kwargs):
+    """Учёт удалённого комментария, в том числе при каскадном удалении."""
+    change_comment_count(instance.post_id, -1)
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(posts_published)
+@receiver(posts_updated)
+def invalidate_feed_counts(sender, **kwargs):
+    """Сброс закешированного количества постов во всех лентах."""
+    bump_version('feed')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+@receiver(post_save, sender=Category)
+def reset_next_publication(sender, **kwargs):
+    """Сброс времени ближайшей отложенной публикации."""
+    cache.delete(NEXT_PUBLICATION_KEY)
+
+
+@receiver(pre_save, sender=Post)
+def set_post_visibility(sender, instance, **kwargs):
+    """Обновление видимости поста перед записью."""
+    instance.is_visible = instance.compute_is_visible()
+
+
+@receiver(pre_save, sender=Post)
+def set_post_excerpt(sender, instance, **kwargs):
+    """Подготовка анонса поста для карточек ленты."""
+    instance.excerpt = instance.compute_excerpt()
+
+
+@receiver(pre_save, sender=Post)
+def set_post_text_html(sender, instance, **kwargs):
+    """Подготовка HTML текста поста для страницы публикации."""
+    instance.text_html = instance.compute_text_html()
+
+
+@receiver(pre_save, sender=Post)
+def remember_image_upload(sender, instance, raw, **kwargs):
+    """Отметка о загрузке нового изображения поста и его сведения.
+
+    Изображение из CreatePostForm уже разобрано формой и повторно
+    не декодируется.
+    """
+    instance._image_uploaded = bool(
+        not raw and instance.image and not instance.image._committed
+    )
+    if instance._image_uploaded:
+        instance.image_meta = read_image_meta(instance.image.file)
+        # Ссылка берётся до записи файла хранилищем: иначе сборщик мог бы
+        # удалить имеющийся файл, запись которого загрузка пропустила.
+        instance._acquired_image = instance.image.field.generate_filename(
+            instance, instance.image.name
+        )
+        MediaBlob.change_refcount(instance._acquired_image, 1)
+    elif not raw and not instance.image:
+        instance.image_meta = {}
+
+
+@receiver(post_save, sender=Post)
+def queue_post_image(sender, instance, **kwargs):
+    """Фоновая обработка нового изображения поста."""
+    if getattr(instance, '_image_uploaded', False):
+        enqueue_image_job(instance)
+
+
+@receiver(post_init, sender=Post)
+def remember_stored_image(sender, instance, **kwargs):
+    """Имя изображения, с которым пост загружен из БД.
+
+    None — поле отложено (defer/only) и прежнее имя неизвестно.
+    """
+    value = instance.__dict__.get('image')
+    if value is None or isinstance(value, str):
+        instance._stored_image = value
+    else:
+        # Новый файл, ещё не записанный в хранилище.
+        instance._stored_image = ''
+
+
+@receiver(post_save, sender=Post)
+def count_image_references(sender, instance, created, raw, **kwargs):
+    """Учёт ссылок на файлы при загрузке и замене изображения поста."""
+    if raw:
+        return
+    name = instance.image.name or ''
+    previous = '' if created else instance._stored_image
+    acquired = getattr(instance, '_acquired_image', None)
+    instance._acquired_image = None
+    if acquired is not None and acquired != name:
+        MediaBlob.change_refcount(acquired, -1)
+        acquired = None
+    if previous is None or previous == name:
+        if acquired:
+            MediaBlob.change_refcount(name, -1)
+        return
+    if not acquired:
+        MediaBlob.change_refcount(name, 1)
+    MediaBlob.change_refcount(previous, -1)
+    instance._stored_image = name
+
+
+@receiver(post_delete, sender=Post)
+def release_post_image(sender, instance, **kwargs):
+    """Освобождение файла изображения удалённого поста."""
+    MediaBlob.change_refcount(instance.image.name, -1)
+
+
+@receiver(post_save, sender=Category)
+def sync_posts_with_category(sender, instance, raw, **kwargs):
+    """Обновление видимости постов категории."""
+    if not raw:
+        sync_category_posts_visibility([instance])
+
+
+@receiver(post_delete, sender=Category)
+def hide_posts_without_category(sender, instance, **kwargs):
+    """Скрытие постов, у которых удалили категорию."""
+    Post.objects.filter(
+        category__isnull=True, is_visible=True
+    ).update(is_visible=False, updated_at=timezone.now())
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+def invalidate_categories(sender, **kwargs):
+    """Сброс закешированных категорий."""
+    bump_version('category')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post(sender, instance, **kwargs):
+    """Сброс закешированного поста."""
+    cache.delete(post_cache_key(instance.pk))
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_commented_post(sender, instance, **kwargs):
+    """Сброс закешированного поста при смене числа комментариев."""
+    cache.delete(post_cache_key(instance.post_id))
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id is not None:
+        cache.delete(post_cache_key(previous_post_id))
+
+
+@receiver(post_save, sender=Category)
+@receiver(post_delete, sender=Category)
+@receiver(post_save, sender=Location)
+@receiver(post_delete, sender=Location)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_related(sender, update_fields=None, **kwargs):
+    """Сброс всех закешированных постов и страниц.
+
+    Отметка о входе пользователя на страницах не выводится и кеш не
+    сбрасывает.
+    """
+    if update_fields is not None and set(update_fields) <= {'last_login'}:
+        return
+    bump_version('post')
+    bump_version('pages')
+
+
+@receiver(posts_published)
+@receiver(posts_updated)
+def invalidate_updated_posts(sender, post_ids, **kwargs):
+    """Сброс постов, изменённых в обход post_save, их страниц и лент."""
+    cache.delete_many([post_cache_key(post_id) for post_id in post_ids])
+    for post_id in post_ids:
+        bump_version(post_pages_namespace(post_id))
+    bump_version('pages:feed')
+
+
+@receiver(post_save, sender=Post)
+@receiver(post_delete, sender=Post)
+def invalidate_post_pages(sender, instance, **kwargs):
+    """Сброс закешированных страниц поста и лент."""
+    bump_version(post_pages_namespace(instance.pk))
+    bump_version('pages:feed')
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def invalidate_comment_pages(sender, instance, **kwargs):
+    """Сброс страниц поста и лент, где выводится число комментариев."""
+    bump_version(post_pages_namespace(instance.post_id))
+    previous_post_id = getattr(instance, '_previous_post_id', None)
+    if previous_post_id not in (None, instance.post_id):
+        bump_version(post_pages_namespace(previous_post_id))
+    bump_version('pages:feed')
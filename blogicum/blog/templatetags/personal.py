@@ -0,0 +1,19 @@
+from django import template
+from django.utils.safestring import mark_safe
+
+from blog.fragments import make_marker, render_fragment
+
+register = template.Library()
+
+
+@register.simple_tag(takes_context=True)
+def personal(context, name, **params):
+    """Фрагмент, зависящий от пользователя.
+
+    При сборке общей копии страницы для кеша выводит метку, которую
+    AnonymousPageCacheMiddleware заменяет фрагментом текущего пользователя.
+    """
+    request = context['request']
+    if getattr(request, 'personal_markers', False):
+        return mark_safe(make_marker(name, params))
+    return mark_safe(render_fragment(request, name, params))
@@ -0,0 +1,63 @@
+from django import template
+from django.templatetags.static import static
+
+from blog.constants import IMAGE_PLACEHOLDER, IMAGE_PLACEHOLDER_SIZE
+from core.images import MODERN_FORMATS, variant_name
+from core.resize import resized_url
+
+register = template.Library()
+
+
+def get_srcset(image, variants, ext=None):
+    """Копии всех размеров с их шириной для атрибута srcset."""
+    widths = {}
+    for variant, (width, _) in variants.items():
+        widths.setdefault(
+            width, image.storage.url(variant_name(image.name, variant, ext))
+        )
+    return ', '.join(f'{url} {width}w' for width, url in widths.items())
+
+
+@register.inclusion_tag('includes/picture.html')
+def post_picture(post, variant, css_class='', lazy=True):
+    """Изображение поста в <picture> с копиями в WebP/AVIF и srcset.
+
+    Размеры и форматы копий берутся из Post.image_meta, без обращения
+    к файлам. Пока фоновая обработка не создала копии, выводится заглушка.
+    """
+    image = post.image
+    variants = post.image_meta.get('variants', {})
+    context = {'alt': post.title, 'css_class': css_class, 'lazy': lazy}
+    if variant not in variants:
+        width, height = IMAGE_PLACEHOLDER_SIZE
+        return {
+            **context, 'src': static(IMAGE_PLACEHOLDER),
+            'width': width, 'height': height,
+        }
+    width, height = variants[variant]
+    formats = post.image_meta.get('formats', ())
+    sources = [
+        {'type': mime, 'srcset': get_srcset(image, variants, ext)}
+        for image_format, (ext, mime) in MODERN_FORMATS.items()
+        if image_format in formats
+    ]
+    return {
+        **context,
+        'src': image.storage.url(variant_name(image.name, variant)),
+        'srcset': get_srcset(image, variants),
+        'sources': sources,
+        'width': width,
+        'height': height,
+    }
+
+
+@register.simple_tag
+def resized_image_url(post, width, height):
+    """Подписанный адрес изображения поста, вписанного в width×height.
+
+    Для размеров, которых нет среди THUMBNAIL_SIZES: копия создаётся
+    при первом запросе, без повторной обработки всех изображений.
+    """
+    if not post.image:
+        return static(IMAGE_PLACEHOLDER)
+    return resized_url(post.image.name, width, height)
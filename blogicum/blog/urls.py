@@ -39,6 +39,10 @@ post_id_urls = [
         'comment/',
         views.CreateComment.as_view(),
         name='add_comment'),
+    path(
+        'comments/',
+        views.PostComments.as_view(),
+        name='post_comments'),
     path(
         'edit_comment/<int:comment_id>/',
         views.EditComment.as_view(),
@@ -58,4 +62,5 @@ urlpatterns = [
     path('category/<slug:category_slug>/',
          views.CategoryPosts.as_view(),
          name='category_posts'),
+    path('fragments/<str:name>/', views.personal_fragment, name='fragment'),
 ]
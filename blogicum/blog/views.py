@@ -1,17 +1,31 @@
+from django.conf import settings
 from django.contrib.auth import get_user_model
 from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.core.paginator import InvalidPage
+from django.http import Http404, HttpResponse, JsonResponse
 from django.urls import reverse, reverse_lazy
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control, patch_vary_headers
+from django.utils.functional import cached_property
 from django.views.generic import (
     CreateView, UpdateView, DeleteView, DetailView
 )
 
+from blog.constants import (
+    MEDIA_CACHE_TIMEOUT, RESIZE_MAX_SIZE, THUMBNAIL_QUALITY, THUMBNAIL_SIZES
+)
 from blog.forms import CreateCommentForm, CreatePostForm, ProfileForm
+from blog.fragments import render_fragment
 from blog.mixins import (
-    ListPostsMixin, WorkCommentsMixin, WorkPostsMixin
+    ListPostsMixin, PostCommentsMixin, WorkCommentsMixin, WorkPostsMixin
 )
 from blog.models import Category, Comment, Post
-from core.service import get_post_list, get_published_post_list
+from blog.publication import publish_due_posts
+from core.identity_map import get_identity_map
+from core.images import original_root
+from core.media import serve_media
+from core.resize import check_resize_signature, get_resized
+from core.service import get_post_list, get_published_category
 
 User = get_user_model()
 
@@ -52,47 +66,77 @@ class DeletePost(WorkPostsMixin, DeleteView):
         return context
 
 
-class PostDetail(DetailView):
+class PostDetail(PostCommentsMixin, DetailView):
     """Отображение одного из существующих постов."""
 
-    model = Post
     template_name = 'blog/detail.html'
-    pk_url_kwarg = 'post_id'
-
-    def get_object(self):
-        post = super().get_object()
-        if self.request.user == post.author:
-            return post
-        return get_object_or_404(
-            get_published_post_list(),
-            id=post.id)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
         context['form'] = CreateCommentForm()
-        context['comments'] = self.object.comments.select_related('author')
+        context['comments'] = self.get_comments_paginator().first_page()
+        return context
+
+
+class PostComments(PostCommentsMixin, DetailView):
+    """Подгрузка следующей порции комментариев: HTML-фрагмент или JSON."""
+
+    template_name = 'includes/comment_list.html'
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        paginator = self.get_comments_paginator()
+        cursor = self.request.GET.get('cursor')
+        if not cursor:
+            context['comments'] = paginator.first_page()
+            return context
+        try:
+            context['comments'] = paginator.cursor_page(cursor)
+        except InvalidPage as error:
+            raise Http404(str(error))
         return context
 
+    def render_to_response(self, context, **response_kwargs):
+        # Формат задаётся только адресом (?format=json), а не заголовком
+        # Accept: кеш страниц и прокси различают ответы по URL.
+        if self.request.GET.get('format') != 'json':
+            return super().render_to_response(context, **response_kwargs)
+        comments = context['comments']
+        return JsonResponse({
+            'comments': [
+                {
+                    'id': comment.id,
+                    'author': comment.author.username,
+                    'text': comment.text,
+                    'created_dt': comment.created_dt,
+                }
+                for comment in comments
+            ],
+            'next_cursor': comments.next_cursor,
+        })
+
 
 class CategoryPosts(ListPostsMixin):
     """Определение категории публикации."""
 
     template_name = 'blog/category.html'
 
+    @cached_property
+    def category(self):
+        slug = self.kwargs['category_slug']
+        return get_identity_map(self.request).get(
+            Category, lambda: get_published_category(slug), slug=slug
+        )
+
     def get_queryset(self):
-        category = get_object_or_404(
-            Category,
-            is_published=True,
-            slug=self.kwargs.get('category_slug'))
-        return super().get_queryset().filter(category=category)
+        return super().get_queryset().filter(category_id=self.category.pk)
+
+    def get_etag_parts(self):
+        return (*super().get_etag_parts(), self.category.updated_at)
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['category'] = get_object_or_404(
-            Category,
-            is_published=True,
-            slug=self.kwargs.get('category_slug')
-        )
+        context['category'] = self.category
         return context
 
 
@@ -102,19 +146,25 @@ class Profile(ListPostsMixin):
     template_name = 'blog/profile.html'
     form_class = ProfileForm
 
+    @cached_property
+    def author(self):
+        return get_identity_map(self.request).get_object_or_404(
+            User, username=self.kwargs['username']
+        )
+
     def get_queryset(self):
-        author = get_object_or_404(
-            User,
-            username=self.kwargs['username'])
-        if self.request.user != author:
-            return super().get_queryset().filter(author=author)
-        return get_post_list().filter(author=author)
+        if self.request.user != self.author:
+            return super().get_queryset().filter(author_id=self.author.pk)
+        return get_post_list().filter(author_id=self.author.pk)
+
+    def get_feed_key(self):
+        if self.request.user.username == self.kwargs['username']:
+            return f'{self.request.path}:own'
+        return self.request.path
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        context['profile'] = get_object_or_404(User, username=self.kwargs.get(
-            'username'
-        ))
+        context['profile'] = self.author
         return context
 
     def form_valid(self, form):
@@ -151,7 +201,9 @@ class CreateComment(LoginRequiredMixin, CreateView):
         return reverse('blog:post_detail', args=[self.kwargs['post_id']])
 
     def form_valid(self, form):
-        form.instance.post = get_object_or_404(Post, pk=self.kwargs['post_id'])
+        form.instance.post = get_identity_map(
+            self.request
+        ).get_object_or_404(Post, pk=self.kwargs['post_id'])
         form.instance.author = self.request.user
         return super().form_valid(form)
 
@@ -166,3 +218,93 @@ class EditComment(WorkCommentsMixin,
 class DeleteComment(WorkCommentsMixin,
                     DeleteView):
     """Удаление комментария."""
+
+
+def personal_fragment(request, name):
+    """Персональный фрагмент страницы для сборки на прокси (ESI)."""
+    try:
+        content = render_fragment(request, name, request.GET.dict())
+    except (KeyError, TypeError):
+        raise Http404('Фрагмент не найден.')
+    response = HttpResponse(content)
+    patch_cache_control(response, private=True)
+    patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def media_posts(path):
+    """Посты, изображение которых — файл path или оригинал его копии.
+
+    Оригинал и его копии делят имя без расширения (для загрузок —
+    posts_images/ab/<sha256>), поэтому посты ищутся по диапазону имён
+    с этим корнем: два параметра и индекс blog_post.image вместо
+    перебора возможных расширений оригинала.
+    """
+    root = original_root(path, THUMBNAIL_SIZES)
+    return [
+        post for post in Post.objects.filter(
+            image__gte=f'{root}.', image__lt=f'{root}/'
+        ).only('image', 'is_visible', 'author_id')
+        if original_root(post.image.name, THUMBNAIL_SIZES) == root
+    ]
+
+
+def check_media_access(request, path):
+    """Доступ к изображению поста или его копии; True — оно публичное.
+
+    Изображения видимых постов отдаются всем, остальные — только автору
+    поста и персоналу; для прочих файлов и постов — 404. Отложенные
+    посты публикуются, только если видимого поста с файлом не нашлось.
+    """
+    if not path.startswith('posts_images/'):
+        raise Http404('Файл не найден.')
+    posts = media_posts(path)
+    public = any(post.is_visible for post in posts)
+    if not public and posts and publish_due_posts():
+        posts = media_posts(path)
+        public = any(post.is_visible for post in posts)
+    if not public and not (request.user.is_staff or any(
+        post.author_id == request.user.pk for post in posts
+    )):
+        raise Http404('Файл не найден.')
+    return public
+
+
+def patch_media_cache_control(response, public):
+    """Публичные изображения кешируют прокси, остальные — только браузер."""
+    if public:
+        patch_cache_control(
+            response, public=True, max_age=MEDIA_CACHE_TIMEOUT
+        )
+    else:
+        patch_cache_control(response, private=True)
+        patch_vary_headers(response, ('Cookie',))
+    return response
+
+
+def media(request, path):
+    """Изображение поста или его копия с проверкой доступа."""
+    public = check_media_access(request, path)
+    return patch_media_cache_control(serve_media(request, path), public)
+
+
+def resized_media(request, width, height, path):
+    """Изображение поста, вписанное в width×height, по подписанному адресу.
+
+    Копия создаётся при первом запросе и хранится в дисковом кеше
+    core.resize; подпись не даёт запрашивать произвольные размеры.
+    """
+    if not (
+        0 < width <= RESIZE_MAX_SIZE and 0 < height <= RESIZE_MAX_SIZE
+        and check_resize_signature(
+            width, height, path, request.GET.get('s', '')
+        )
+    ):
+        raise Http404('Файл не найден.')
+    public = check_media_access(request, path)
+    try:
+        source = safe_join(settings.MEDIA_ROOT, path)
+        name = get_resized(source, path, width, height, THUMBNAIL_QUALITY)
+    except (OSError, ValueError):
+        raise Http404('Файл не найден.')
+    return patch_media_cache_control(serve_media(request, name), public)
@@ -5,3 +5,9 @@ from django.core.asgi import get_asgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_asgi_application()
+
+from blog.image_jobs import start_image_workers  # noqa: E402
+from blog.publication import start_publication_scheduler  # noqa: E402
+
+start_publication_scheduler()
+start_image_workers()
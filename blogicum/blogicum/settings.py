@@ -1,3 +1,4 @@
+import os
 from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
@@ -28,6 +29,7 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'blog.middleware.AnonymousPageCacheMiddleware',
 ]
 
 if DEBUG:
@@ -75,6 +77,63 @@ DATABASES = {
     }
 }
 
+# Кеш должен быть общим для всех процессов веб-сервера: версии
+# пространств ключей (core.cache), закешированные посты и дата ближайшей
+# публикации сбрасываются сигналами в том процессе, где изменились данные.
+# LocMemCache у каждого процесса свой и годится только для одного
+# процесса; при нескольких задайте MEMCACHED_LOCATION (host:port).
+MEMCACHED_LOCATION = os.environ.get('MEMCACHED_LOCATION')
+
+if MEMCACHED_LOCATION:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': MEMCACHED_LOCATION,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Начиная с какой оценки планировщика считать ленту приблизительно
+# (None — всегда точный подсчёт)
+FEED_COUNT_APPROXIMATE_THRESHOLD = None
+
+# Время жизни кеша страниц для неаутентифицированных посетителей,
+# секунды (0 — кеш выключен)
+PAGE_CACHE_TIMEOUT = 60 * 5
+
+# Кешировать общую копию страниц с метками персональных фрагментов
+# и для аутентифицированных пользователей
+PAGE_CACHE_SHARED_SHELL = False
+
+# Отдавать метки как <esi:include> для сборки страниц на прокси
+# вместо подстановки фрагментов в процессе Django
+PAGE_CACHE_EDGE_INCLUDES = False
+
+# Период (секунды) фоновой публикации отложенных постов
+# в процессе веб-сервера (None — только команда publish_scheduled)
+PUBLICATION_SCHEDULER_INTERVAL = None
+
+# Количество фоновых потоков обработки изображений в процессе
+# веб-сервера (None — обработка сразу после сохранения поста;
+# очередь также разбирает команда process_image_jobs)
+IMAGE_WORKERS = 2
+
+# Префикс внутреннего location nginx с MEDIA_ROOT: тело файла отдаёт
+# nginx по заголовку X-Accel-Redirect (None — не использовать)
+MEDIA_ACCEL_REDIRECT = None
+
+# Отдавать тело файла через X-Sendfile (Apache mod_xsendfile, lighttpd)
+MEDIA_X_SENDFILE = False
+
+# Объём дискового кеша копий изображений произвольного размера
+# (media/resize/), байты; давно не запрошенные копии удаляются
+MEDIA_RESIZE_CACHE_BYTES = 256 * 1024 * 1024
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -1,10 +1,11 @@
 from django.conf import settings
-from django.conf.urls.static import static
 from django.contrib import admin
 from django.contrib.auth.forms import UserCreationForm
 from django.urls import include, path, reverse_lazy
 from django.views.generic.edit import CreateView
 
+from blog.views import media, resized_media
+
 
 urlpatterns = [
     path('pages/', include('pages.urls', namespace='pages')),
@@ -19,14 +20,21 @@ urlpatterns = [
         ),
         name='registration',
     ),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}resize/<int:width>x<int:height>/"
+        '<path:path>',
+        resized_media,
+        name='resized_media',
+    ),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}<path:path>", media, name='media'
+    ),
     path('', include('blog.urls', namespace='blog')),
 ]
 
 if settings.DEBUG:
     import debug_toolbar
     urlpatterns += (path('__debug__/', include(debug_toolbar.urls)),)
-    urlpatterns += static(settings.MEDIA_URL,
-                          document_root=settings.MEDIA_ROOT)
 
 handler404 = 'pages.views.page_not_found'
 handler500 = 'pages.views.server_error'
@@ -5,3 +5,9 @@ from django.core.wsgi import get_wsgi_application
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'blogicum.settings')
 
 application = get_wsgi_application()
+
+from blog.image_jobs import start_image_workers  # noqa: E402
+from blog.publication import start_publication_scheduler  # noqa: E402
+
+start_publication_scheduler()
+start_image_workers()
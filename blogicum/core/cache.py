@@ -0,0 +1,41 @@
+from django.core.cache import cache
+
+
+def _version_key(namespace):
+    return f'version:{namespace}'
+
+
+def get_version(namespace):
+    """Текущая версия пространства ключей кеша."""
+    key = _version_key(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, 1, None)
+        version = cache.get(key, 1)
+    return version
+
+
+def get_versions(*namespaces):
+    """Версии нескольких пространств за одно обращение к кешу."""
+    keys = [_version_key(namespace) for namespace in namespaces]
+    found = cache.get_many(keys)
+    return [
+        found.get(key) or get_version(namespace)
+        for namespace, key in zip(namespaces, keys)
+    ]
+
+
+def bump_version(namespace):
+    """Инвалидация всех ключей пространства сменой его версии."""
+    key = _version_key(namespace)
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.set(key, 2, None)
+
+
+def versioned_key(namespace, *parts):
+    """Ключ кеша, устаревающий при смене версии пространства."""
+    return ':'.join(
+        (namespace, str(get_version(namespace)), *map(str, parts))
+    )
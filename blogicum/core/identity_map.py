@@ -0,0 +1,52 @@
+from django.shortcuts import get_object_or_404
+
+
+class IdentityMap:
+    """Объекты, уже загруженные в рамках одного запроса.
+
+    Повторный поиск того же объекта по тем же полям (или по pk)
+    возвращает загруженный экземпляр без запроса к БД.
+    """
+
+    def __init__(self):
+        self._objects = {}
+
+    @staticmethod
+    def _key(model, lookup):
+        fields = tuple(sorted(
+            ('pk' if name in ('id', 'pk') else name, value)
+            for name, value in lookup.items()
+        ))
+        return model._meta.label_lower, fields
+
+    def add(self, obj, *fields):
+        """Запоминание объекта по pk и по значениям полей fields."""
+        model = obj.__class__
+        self._objects[self._key(model, {'pk': obj.pk})] = obj
+        for name in fields:
+            lookup = {name: getattr(obj, name)}
+            self._objects[self._key(model, lookup)] = obj
+        return obj
+
+    def get(self, model, loader, **lookup):
+        """Объект из карты либо загруженный вызовом loader()."""
+        key = self._key(model, lookup)
+        if key not in self._objects:
+            self._objects[key] = self.add(loader())
+        return self._objects[key]
+
+    def get_object_or_404(self, model, **lookup):
+        return self.get(
+            model, lambda: get_object_or_404(model, **lookup), **lookup
+        )
+
+
+def get_identity_map(request):
+    """Карта объектов текущего запроса; пользователь запроса уже в ней."""
+    identity_map = getattr(request, '_identity_map', None)
+    if identity_map is None:
+        identity_map = request._identity_map = IdentityMap()
+        user = getattr(request, 'user', None)
+        if user is not None and user.is_authenticated:
+            identity_map.add(user, user.USERNAME_FIELD)
+    return identity_map
@@ -0,0 +1,130 @@
+import hashlib
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+# Современные форматы копий: формат Pillow → (расширение, MIME-тип),
+# в порядке предпочтения для <picture>
+MODERN_FORMATS = {
+    'AVIF': ('.avif', 'image/avif'),
+    'WEBP': ('.webp', 'image/webp'),
+}
+
+
+def variant_name(name, variant, ext=None):
+    """Имя копии рядом с оригиналом: posts_images/cat.jpg → cat.card.jpg.
+
+    ext задаёт другое расширение, например .webp для копии в WebP.
+    """
+    root, original_ext = os.path.splitext(name)
+    return f'{root}.{variant}{ext or original_ext}'
+
+
+def original_root(name, variants):
+    """Имя оригинала без расширения, общее для него и всех его копий.
+
+    posts_images/cat.jpg, posts_images/cat.card.jpg
+    и posts_images/cat.card.webp → posts_images/cat.
+    """
+    root = os.path.splitext(name)[0]
+    base, variant = os.path.splitext(root)
+    if variant[1:] in variants:
+        return base
+    return root
+
+
+def supported_formats():
+    """Современные форматы, которые умеет записывать установленный Pillow."""
+    Image.init()
+    return [
+        image_format for image_format in MODERN_FORMATS
+        if image_format in Image.SAVE
+    ]
+
+
+def read_image_meta(file):
+    """Ширина, высота, объём, MIME-тип и SHA-256 файла изображения.
+
+    Изображение, уже разобранное полем формы (UploadedFile.image),
+    повторно не декодируется.
+    """
+    image = getattr(file, 'image', None)
+    if image is None:
+        file.seek(0)
+        with Image.open(file) as image:
+            (width, height), image_format = image.size, image.format
+    else:
+        (width, height), image_format = image.size, image.format
+    digest = hashlib.sha256()
+    for chunk in file.chunks():
+        digest.update(chunk)
+    file.seek(0)
+    return {
+        'width': width,
+        'height': height,
+        'size': file.size,
+        'mime': Image.MIME.get(image_format, ''),
+        'sha256': digest.hexdigest(),
+    }
+
+
+def render_variant(image, size, image_format, quality):
+    """Уменьшенная копия изображения: байты файла и [ширина, высота]."""
+    thumbnail = image.copy()
+    thumbnail.thumbnail(size, Image.Resampling.LANCZOS)
+    if image_format == 'JPEG' and thumbnail.mode not in ('RGB', 'L'):
+        thumbnail = thumbnail.convert('RGB')
+    elif (image_format in MODERN_FORMATS
+            and thumbnail.mode not in ('RGB', 'RGBA')):
+        thumbnail = thumbnail.convert('RGBA')
+    buffer = BytesIO()
+    thumbnail.save(
+        buffer, image_format, quality=quality, optimize=True
+    )
+    return buffer.getvalue(), list(thumbnail.size)
+
+
+def make_variants(field_file, sizes, quality, formats=()):
+    """Создание уменьшенных копий файла изображения в его хранилище.
+
+    Копии делаются в формате оригинала и в каждом из formats.
+    Существующие копии перезаписываются. Возвращает размеры копий:
+    {вариант: [ширина, высота]}.
+    """
+    storage = field_file.storage
+    with field_file.open('rb') as source, Image.open(source) as image:
+        targets = [(image.format or 'PNG', None)] + [
+            (image_format, MODERN_FORMATS[image_format][0])
+            for image_format in formats
+        ]
+        image = ImageOps.exif_transpose(image)
+        variants = {}
+        for variant, size in sizes.items():
+            for image_format, ext in targets:
+                name = variant_name(field_file.name, variant, ext)
+                content, variants[variant] = render_variant(
+                    image, size, image_format, quality
+                )
+                if storage.exists(name):
+                    storage.delete(name)
+                storage.save(name, ContentFile(content))
+    return variants
+
+
+def strip_metadata(field_file, quality):
+    """Оригинал, перекодированный без EXIF (с учётом поворота).
+
+    Возвращает файл для сохранения или None, если EXIF в файле нет.
+    Сам оригинал не меняется: он может быть общим для нескольких постов.
+    """
+    with field_file.open('rb') as source, Image.open(source) as image:
+        if not image.getexif():
+            return None
+        image_format = image.format or 'PNG'
+        upright = ImageOps.exif_transpose(image)
+        content, _ = render_variant(
+            upright, upright.size, image_format, quality
+        )
+    return ContentFile(content, name=os.path.basename(field_file.name))
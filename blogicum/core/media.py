@@ -0,0 +1,147 @@
+import mimetypes
+import os
+import re
+from urllib.parse import quote
+
+from django.conf import settings
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+RANGE_RE = re.compile(r'^bytes=(\d*)-(\d*)$')
+
+
+class RangeFile:
+    """Файл, читаемый только до конца запрошенного диапазона."""
+
+    def __init__(self, file, length):
+        self.file = file
+        self.remaining = length
+
+    def read(self, size=-1):
+        if size < 0 or size > self.remaining:
+            size = self.remaining
+        data = self.file.read(size)
+        self.remaining -= len(data)
+        return data
+
+    def close(self):
+        self.file.close()
+
+
+def file_etag(stat):
+    """Значение ETag по размеру и времени изменения, без чтения содержимого."""
+    return quote_etag(f'{stat.st_size:x}-{int(stat.st_mtime * 1000):x}')
+
+
+def is_latin1(value):
+    """Можно ли передать value в заголовке без MIME-кодирования.
+
+    X-Sendfile содержит путь как есть, поэтому файлы с другими символами
+    в имени отдаёт сам Django.
+    """
+    try:
+        value.encode('latin-1')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+def parse_range(header, size):
+    """Диапазон (начало, конец включительно) из заголовка Range.
+
+    None — заголовка нет или он не поддерживается (несколько диапазонов),
+    тогда отдаётся весь файл. ValueError — диапазон вне файла.
+    """
+    match = RANGE_RE.match(header.replace(' ', ''))
+    if match is None or match.groups() == ('', ''):
+        return None
+    start, end = match.groups()
+    if not start:
+        start, end = max(size - int(end), 0), size - 1
+    else:
+        start = int(start)
+        end = min(int(end), size - 1) if end else size - 1
+    if start > end or start >= size:
+        raise ValueError(header)
+    return start, end
+
+
+def serve_media(request, path, document_root=None):
+    """Ответ с файлом path из document_root (по умолчанию MEDIA_ROOT).
+
+    С MEDIA_ACCEL_REDIRECT тело отдаёт nginx по X-Accel-Redirect,
+    с MEDIA_X_SENDFILE — Apache или lighttpd по X-Sendfile (кроме путей
+    с символами вне Latin-1); диапазоны
+    и условные запросы они обрабатывают сами. Иначе файл отдаёт Django:
+    If-None-Match и If-Modified-Since отвечают 304, Range — 206,
+    а FileResponse передаёт файл серверу через wsgi.file_wrapper.
+    """
+    document_root = document_root or settings.MEDIA_ROOT
+    try:
+        fullpath = safe_join(document_root, path)
+        stat = os.stat(fullpath)
+    except (OSError, ValueError):
+        raise Http404('Файл не найден.')
+    if not os.path.isfile(fullpath):
+        raise Http404('Файл не найден.')
+    content_type, encoding = mimetypes.guess_type(fullpath)
+    content_type = content_type or 'application/octet-stream'
+    etag = file_etag(stat)
+    response = get_conditional_response(
+        request, etag=etag, last_modified=int(stat.st_mtime)
+    )
+    if response is not None:
+        return response
+    if settings.MEDIA_ACCEL_REDIRECT:
+        # nginx раскодирует URI; без кодирования Django записал бы
+        # кириллицу и пробелы в MIME-виде =?utf-8?b?…?=.
+        response = HttpResponse(content_type=content_type)
+        response['X-Accel-Redirect'] = (
+            settings.MEDIA_ACCEL_REDIRECT.rstrip('/') + '/'
+            + quote(path.lstrip('/'))
+        )
+    elif settings.MEDIA_X_SENDFILE and is_latin1(fullpath):
+        response = HttpResponse(content_type=content_type)
+        response['X-Sendfile'] = fullpath
+    else:
+        response = stream_file(request, fullpath, stat, etag, content_type)
+    response['ETag'] = etag
+    response['Last-Modified'] = http_date(stat.st_mtime)
+    if encoding:
+        response['Content-Encoding'] = encoding
+    return response
+
+
+def stream_file(request, fullpath, stat, etag, content_type):
+    """Весь файл или запрошенный диапазон через FileResponse."""
+    byte_range = None
+    if_range = request.META.get('HTTP_IF_RANGE')
+    if not if_range or if_range == etag:
+        try:
+            byte_range = parse_range(
+                request.META.get('HTTP_RANGE', ''), stat.st_size
+            )
+        except ValueError:
+            response = HttpResponse(status=416)
+            response['Content-Range'] = f'bytes */{stat.st_size}'
+            return response
+    file = open(fullpath, 'rb')
+    if byte_range is None:
+        response = FileResponse(file, content_type=content_type)
+    else:
+        start, end = byte_range
+        length = end - start + 1
+        file.seek(start)
+        if end < stat.st_size - 1:
+            # Диапазон до конца файла отдаётся самим файлом — сервер
+            # может передать его без копирования (sendfile).
+            file = RangeFile(file, length)
+        response = FileResponse(
+            file, status=206, content_type=content_type
+        )
+        response['Content-Length'] = length
+        response['Content-Range'] = f'bytes {start}-{end}/{stat.st_size}'
+    response['Accept-Ranges'] = 'bytes'
+    return response
@@ -2,7 +2,10 @@ from django.db import models
 
 
 class PublishedCreatedModel(models.Model):
-    """Абстрактная модель. Добвляет флаг is_published и дату created_at."""
+    """Абстрактная модель.
+
+    Добвляет флаг is_published, даты created_at и updated_at.
+    """
 
     is_published = models.BooleanField(
         default=True,
@@ -13,6 +16,10 @@ class PublishedCreatedModel(models.Model):
         auto_now_add=True,
         verbose_name='Добавлено'
     )
+    updated_at = models.DateTimeField(
+        auto_now=True,
+        verbose_name='Изменено'
+    )
 
     class Meta:
         abstract = True
@@ -0,0 +1,211 @@
+import datetime
+import json
+from functools import reduce
+from operator import or_
+
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.paginator import InvalidPage, Page, Paginator
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from django.utils.functional import cached_property
+from django.utils.http import urlsafe_base64_decode, urlsafe_base64_encode
+
+
+class InvalidCursor(InvalidPage):
+    pass
+
+
+class CursorEncoder(DjangoJSONEncoder):
+    """Сохраняет время с микросекундами, чтобы курсор был точным."""
+
+    def default(self, o):
+        if isinstance(o, datetime.datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+def encode_cursor(values, backwards=False):
+    """Упаковка значений ключа сортировки в непрозрачный токен."""
+    payload = json.dumps({'v': values, 'b': backwards}, cls=CursorEncoder)
+    return urlsafe_base64_encode(payload.encode())
+
+
+def decode_cursor(token):
+    """Распаковка токена в значения ключа сортировки и направление."""
+    try:
+        payload = json.loads(urlsafe_base64_decode(token))
+        return payload['v'], bool(payload['b'])
+    except (ValueError, TypeError, KeyError):
+        raise InvalidCursor('Некорректный курсор страницы.')
+
+
+def estimate_count(queryset):
+    """Оценка числа строк по плану запроса; None, если СУБД её не даёт."""
+    if connections[queryset.db].vendor != 'postgresql':
+        return None
+    plan = json.loads(queryset.order_by().explain(format='json'))
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+def keyset_filter(fields, values, forward=True):
+    """Условие «строго после ключа» для сортировки по нескольким полям."""
+    conditions = []
+    for index, (name, descending) in enumerate(fields):
+        lookup = 'lt' if descending == forward else 'gt'
+        equal = {
+            field_name: value
+            for (field_name, _), value in zip(fields[:index], values)
+        }
+        conditions.append(
+            Q(**equal, **{f'{name}__{lookup}': values[index]})
+        )
+    return reduce(or_, conditions)
+
+
+class CursorPage:
+    """Страница, полученная по курсору; повторяет интерфейс Page."""
+
+    number = None
+
+    def __init__(self, object_list, paginator, has_next, has_previous):
+        self.object_list = object_list
+        self.paginator = paginator
+        self._has_next = has_next
+        self._has_previous = has_previous
+
+    def __repr__(self):
+        return '<Cursor page>'
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __getitem__(self, index):
+        return self.object_list[index]
+
+    def has_next(self):
+        return self._has_next
+
+    def has_previous(self):
+        return self._has_previous
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+    @property
+    def next_cursor(self):
+        if self.has_next() and self.object_list:
+            return self.paginator.cursor_for(self.object_list[-1])
+        return None
+
+    @property
+    def previous_cursor(self):
+        if self.has_previous() and self.object_list:
+            return self.paginator.cursor_for(
+                self.object_list[0], backwards=True
+            )
+        return None
+
+
+class FeedPage(Page):
+    """Страница по номеру, ссылающаяся на следующую страницу курсором."""
+
+    previous_cursor = None
+
+    @property
+    def next_cursor(self):
+        if self.has_next():
+            return self.paginator.cursor_for(self[len(self) - 1])
+        return None
+
+
+class FeedPaginator(Paginator):
+    """Пагинатор ленты: по номеру страницы и по курсору (keyset).
+
+    Курсорный режим продолжает выборку от ключа сортировки последней
+    показанной записи, поэтому время ответа не зависит от глубины страницы.
+    Если передан count_key, общее число записей берётся из кеша; при
+    approximate_threshold большие выборки считаются по оценке планировщика.
+    """
+
+    def __init__(self, object_list, per_page, ordering=('-id',),
+                 count_key=None, count_timeout=None,
+                 approximate_threshold=None, **kwargs):
+        self.fields = [
+            (name.lstrip('-'), name.startswith('-')) for name in ordering
+        ]
+        self.count_key = count_key
+        self.count_timeout = count_timeout
+        self.approximate_threshold = approximate_threshold
+        super().__init__(object_list.order_by(*ordering), per_page, **kwargs)
+
+    @cached_property
+    def count(self):
+        if self.count_key is None:
+            return self._count_objects()
+        count = cache.get(self.count_key)
+        if count is None:
+            count = self._count_objects()
+            cache.set(self.count_key, count, self.count_timeout)
+        return count
+
+    def _count_objects(self):
+        if self.approximate_threshold is not None:
+            estimate = estimate_count(self.object_list)
+            if estimate is not None and estimate >= self.approximate_threshold:
+                return estimate
+        return self.object_list.count()
+
+    def _get_page(self, *args, **kwargs):
+        return FeedPage(*args, **kwargs)
+
+    @property
+    def last_cursor(self):
+        """Курсор последней страницы, не требующий подсчёта записей."""
+        return encode_cursor(None, backwards=True)
+
+    def cursor_for(self, obj, backwards=False):
+        return encode_cursor(
+            [getattr(obj, name) for name, _ in self.fields], backwards
+        )
+
+    def first_page(self):
+        """Первая страница в курсорном режиме."""
+        return self._keyset_page(None, False)
+
+    def cursor_page(self, cursor):
+        return self._keyset_page(*decode_cursor(cursor))
+
+    def _keyset_page(self, values, backwards):
+        queryset = self.object_list
+        if values is not None:
+            queryset = queryset.filter(
+                keyset_filter(
+                    self.fields, self._to_python(values), not backwards
+                )
+            )
+        if backwards:
+            queryset = queryset.reverse()
+        object_list = list(queryset[:self.per_page + 1])
+        has_more = len(object_list) > self.per_page
+        object_list = object_list[:self.per_page]
+        if backwards:
+            object_list.reverse()
+            return CursorPage(object_list, self, values is not None, has_more)
+        return CursorPage(object_list, self, has_more, values is not None)
+
+    def _to_python(self, values):
+        if not isinstance(values, list) or len(values) != len(self.fields):
+            raise InvalidCursor('Некорректный курсор страницы.')
+        opts = self.object_list.model._meta
+        try:
+            return [
+                opts.get_field(name).to_python(value)
+                for (name, _), value in zip(self.fields, values)
+            ]
+        except ValidationError:
+            raise InvalidCursor('Некорректный курсор страницы.')
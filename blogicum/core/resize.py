@@ -0,0 +1,173 @@
+import os
+import threading
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.signing import Signer
+from django.urls import reverse
+from django.utils.crypto import constant_time_compare
+from PIL import Image, ImageOps
+
+from core.images import render_variant
+
+# Каталог копий произвольного размера внутри MEDIA_ROOT
+RESIZE_DIR = 'resized'
+
+# Ключ кеша с объёмом каталога копий, байты
+RESIZE_BYTES_KEY = 'resize-cache:bytes'
+
+# Доля бюджета, до которой кеш сокращается при превышении, чтобы обход
+# каталога не повторялся после каждой новой копии
+RESIZE_EVICT_RATIO = 0.9
+
+_signer = Signer(salt='core.resize')
+# Копии, которые сейчас создаются: имя → [Lock, число ожидающих]
+_locks = {}
+_locks_guard = threading.Lock()
+
+
+def resize_signature(width, height, path):
+    return _signer.signature(f'{width}x{height}/{path}')
+
+
+def check_resize_signature(width, height, path, signature):
+    return constant_time_compare(
+        resize_signature(width, height, path), signature
+    )
+
+
+def resized_url(path, width, height):
+    """Подписанный адрес копии файла path, вписанной в width×height."""
+    url = reverse('resized_media', args=(width, height, path))
+    return f'{url}?s={resize_signature(width, height, path)}'
+
+
+def resized_name(path, width, height):
+    """Имя копии в кеше относительно MEDIA_ROOT."""
+    return f'{RESIZE_DIR}/{width}x{height}/{path}'
+
+
+def touch(fullpath):
+    """Отметка обращения к копии для LRU; False, если копии нет.
+
+    Меняется только время доступа: время изменения входит в ETag.
+    """
+    try:
+        stat = os.stat(fullpath)
+        os.utime(fullpath, (time.time(), stat.st_mtime))
+    except FileNotFoundError:
+        return False
+    return True
+
+
+def render_resized(source, target, size, quality):
+    """Запись копии source, вписанной в size, атомарной заменой файла.
+
+    Возвращает, на сколько байт вырос каталог копий.
+    """
+    with Image.open(source) as image:
+        image_format = image.format or 'PNG'
+        content, _ = render_variant(
+            ImageOps.exif_transpose(image), size, image_format, quality
+        )
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    temporary = f'{target}.{os.getpid()}.{threading.get_ident()}.tmp'
+    with open(temporary, 'wb') as file:
+        file.write(content)
+    try:
+        # Ту же копию успел записать другой процесс.
+        replaced = os.stat(target).st_size
+    except FileNotFoundError:
+        replaced = 0
+    os.replace(temporary, target)
+    return len(content) - replaced
+
+
+def scan_resized():
+    """Копии в кеше: (время доступа, размер, путь)."""
+    for root, _, filenames in os.walk(
+        os.path.join(settings.MEDIA_ROOT, RESIZE_DIR)
+    ):
+        for filename in filenames:
+            if filename.endswith('.tmp'):
+                continue
+            fullpath = os.path.join(root, filename)
+            try:
+                stat = os.stat(fullpath)
+            except FileNotFoundError:
+                continue
+            yield stat.st_atime, stat.st_size, fullpath
+
+
+def evict_resized(budget, keep=None):
+    """Удаление давно не запрошенных копий сверх budget байт.
+
+    При превышении кеш сокращается до RESIZE_EVICT_RATIO бюджета.
+    Копия keep, только что записанная для ответа, не удаляется.
+    Возвращает объём оставшихся копий.
+    """
+    files = sorted(scan_resized())
+    total = sum(size for _, size, _ in files)
+    if total <= budget:
+        return total
+    limit = budget * RESIZE_EVICT_RATIO
+    for _, size, fullpath in files:
+        if total <= limit:
+            break
+        if fullpath == keep:
+            continue
+        try:
+            os.remove(fullpath)
+        except FileNotFoundError:
+            pass
+        total -= size
+    return total
+
+
+def add_cached_bytes(delta):
+    """Учёт объёма каталога копий; None — объём ещё не подсчитан."""
+    try:
+        return cache.incr(RESIZE_BYTES_KEY, delta)
+    except ValueError:
+        return None
+
+
+def get_resized(source, path, width, height, quality):
+    """Имя копии файла source в кеше, создаваемой при первом запросе.
+
+    Одновременные запросы одной копии в процессе ждут единственной
+    отрисовки. Копии из разных процессов записываются атомарно, поэтому
+    повторная отрисовка в худшем случае лишь заменяет файл тем же
+    содержимым. Объём каталога копий учитывается в кеше; обход каталога
+    и удаление давно не запрошенных копий нужны, только когда объём
+    превысил MEDIA_RESIZE_CACHE_BYTES.
+    """
+    name = resized_name(path, width, height)
+    target = os.path.join(settings.MEDIA_ROOT, name)
+    if touch(target):
+        return name
+    with _locks_guard:
+        entry = _locks.setdefault(name, [threading.Lock(), 0])
+        entry[1] += 1
+    try:
+        with entry[0]:
+            if not touch(target):
+                total = add_cached_bytes(render_resized(
+                    source, target, (width, height), quality
+                ))
+                budget = settings.MEDIA_RESIZE_CACHE_BYTES
+                if total is None or total > budget:
+                    cache.set(
+                        RESIZE_BYTES_KEY,
+                        evict_resized(budget, keep=target),
+                        None
+                    )
+    finally:
+        with _locks_guard:
+            # Запись удаляет последний из ожидавших: иначе новый запрос
+            # создал бы вторую блокировку, пока первая ещё занята.
+            entry[1] -= 1
+            if not entry[1] and _locks.get(name) is entry:
+                del _locks[name]
+    return name
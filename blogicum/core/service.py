@@ -1,22 +1,81 @@
-from django.db.models import Count
+from django.core.cache import cache
+from django.http import Http404
 from django.utils import timezone
 
-from blog.models import Post
+from blog.constants import CATEGORY_CACHE_TIMEOUT, POST_CACHE_TIMEOUT
+from blog.models import Category, Post
+from blog.publication import publish_due_posts
+from core.cache import versioned_key
 
 
 def get_post_list():
-    """Получение списка всех постов."""
+    """Получение списка всех постов.
+
+    Полный текст в ленте не нужен — карточка выводит анонс excerpt.
+    """
     return Post.objects.select_related(
         'author',
         'category',
         'location'
-    ).annotate(comment_count=Count('comments')).order_by('-pub_date')
+    ).defer('text', 'text_html').order_by('-pub_date', '-id')
 
 
 def get_published_post_list():
-    """Получение списка всех опубликованных постов."""
-    return get_post_list().filter(
-        category__is_published=True,
+    """Получение списка всех опубликованных постов.
+
+    Дата публикации не входит в условие: отложенные посты становятся
+    видимыми при наступлении даты, поэтому запрос одинаков и кешируем.
+    """
+    publish_due_posts()
+    return get_post_list().filter(is_visible=True)
+
+
+def sync_category_posts_visibility(categories):
+    """Пересчёт видимости постов после смены публикации категорий."""
+    posts = Post.objects.filter(category__in=categories)
+    hidden = posts.filter(is_visible=True).exclude(
+        is_published=True, category__is_published=True
+    ).update(is_visible=False, updated_at=timezone.now())
+    shown = posts.filter(
+        is_visible=False,
         is_published=True,
-        pub_date__lt=timezone.now()
-    )
+        category__is_published=True,
+        pub_date__lte=timezone.now()
+    ).update(is_visible=True, updated_at=timezone.now())
+    return hidden + shown
+
+
+def get_published_category(slug):
+    """Получение опубликованной категории по slug через кеш."""
+    key = versioned_key('category', slug)
+    category = cache.get(key)
+    if category is None:
+        category = Category.objects.filter(
+            slug=slug, is_published=True
+        ).first() or False
+        cache.set(key, category, CATEGORY_CACHE_TIMEOUT)
+    if not category:
+        raise Http404('Категория не найдена.')
+    return category
+
+
+def post_cache_key(post_id):
+    return versioned_key('post', post_id)
+
+
+def get_post_detail(post_id):
+    """Получение поста для страницы публикации одним запросом через кеш.
+
+    Видимость не фильтруется: её проверяет вызывающий код по is_visible
+    и автору. Для отсутствующего поста возвращается None.
+    """
+    key = post_cache_key(post_id)
+    post = cache.get(key)
+    if post is None:
+        post = Post.objects.select_related(
+            'author',
+            'category',
+            'location'
+        ).defer('text').filter(pk=post_id).first() or False
+        cache.set(key, post, POST_CACHE_TIMEOUT)
+    return post or None
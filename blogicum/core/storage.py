@@ -0,0 +1,37 @@
+import os
+import uuid
+
+from django.core.files.storage import FileSystemStorage
+
+
+def content_addressed_name(prefix, sha256, filename):
+    """Имя файла по хешу содержимого: prefix/ab/abcdef….jpg."""
+    ext = os.path.splitext(filename)[1].lower()
+    return os.path.join(prefix, sha256[:2], f'{sha256}{ext}')
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """Хранилище файлов, имена которых выводятся из их содержимого.
+
+    Файл с тем же именем уже содержит те же байты, поэтому повторная
+    загрузка не пишет его заново, а возвращает имеющееся имя. Копии,
+    которые нужно перезаписать, предварительно удаляются вызывающим
+    кодом. Учёт ссылок на файлы — blog.models.MediaBlob.
+    """
+
+    def get_available_name(self, name, max_length=None):
+        return name
+
+    def _save(self, name, content):
+        if self.exists(name):
+            return name
+        # Запись во временный файл и атомарная замена: у параллельных
+        # загрузок тех же байтов нет гонки за O_EXCL на общем имени,
+        # в которой FileSystemStorage._save повторял бы попытку с тем же
+        # именем от get_available_name бесконечно.
+        temporary = super()._save(f'{name}.{uuid.uuid4().hex}.tmp', content)
+        os.replace(self.path(temporary), self.path(name))
+        return name
+
+
+media_storage = ContentAddressedStorage()
@@ -0,0 +1,38 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+
+@pytest.mark.django_db
+def test_edit_post_fetches_post_once(
+        user_client, post_with_published_location, django_assert_num_queries):
+    url = reverse('blog:edit_post', args=[post_with_published_location.id])
+    # сессия, пользователь запроса, сам пост и варианты
+    # для полей местоположения и категории в форме
+    with django_assert_num_queries(5):
+        response = user_client.get(url)
+    assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_foreign_comment_edit_redirects_to_post(
+        another_user_client, comment_to_a_post):
+    url = reverse(
+        'blog:edit_comment',
+        args=[comment_to_a_post.post_id, comment_to_a_post.id]
+    )
+    response = another_user_client.get(url)
+    assert response.status_code == HTTPStatus.FOUND
+    assert response.url == reverse(
+        'blog:post_detail', args=[comment_to_a_post.post_id])
+
+
+@pytest.mark.django_db
+def test_comment_of_another_post_is_404(
+        user_client, comment_to_a_post, post_of_another_author):
+    url = reverse(
+        'blog:edit_comment',
+        args=[post_of_another_author.id, comment_to_a_post.id]
+    )
+    assert user_client.get(url).status_code == HTTPStatus.NOT_FOUND
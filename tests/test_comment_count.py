@@ -0,0 +1,58 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+
+def _refreshed_count(post):
+    return Post.objects.values_list(
+        'comment_count', flat=True).get(pk=post.pk)
+
+
+@pytest.mark.django_db
+def test_comment_count_follows_comments(
+        mixer: Mixer, post_with_published_location, another_user):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post)
+    assert _refreshed_count(post) == 3, (
+        "Убедитесь, что счётчик комментариев увеличивается при добавлении"
+        " комментария."
+    )
+
+    comments[0].delete()
+    assert _refreshed_count(post) == 2, (
+        "Убедитесь, что счётчик комментариев уменьшается при удалении"
+        " комментария."
+    )
+
+    comments[1].author.delete()
+    assert _refreshed_count(post) == 1, (
+        "Убедитесь, что счётчик комментариев учитывает каскадное удаление"
+        " комментариев вместе с их автором."
+    )
+
+
+@pytest.mark.django_db
+def test_comment_count_moves_with_comment(
+        mixer: Mixer, post_with_published_location, post_of_another_author):
+    comment = mixer.blend(Comment, post=post_with_published_location)
+    comment.post = post_of_another_author
+    comment.save()
+    assert _refreshed_count(post_with_published_location) == 0
+    assert _refreshed_count(post_of_another_author) == 1
+
+
+@pytest.mark.django_db
+def test_recount_comments_command(
+        mixer: Mixer, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post)
+    Post.objects.filter(pk=post.pk).update(comment_count=10)
+    call_command('recount_comments', stdout=StringIO())
+    assert _refreshed_count(post) == 2, (
+        "Убедитесь, что команда `recount_comments` восстанавливает счётчики"
+        " комментариев."
+    )
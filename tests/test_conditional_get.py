@@ -0,0 +1,171 @@
+from datetime import timedelta
+from http import HTTPStatus
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+from django.utils import timezone
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+from core.service import get_post_detail
+
+
+@pytest.mark.django_db
+def test_feed_answers_not_modified(
+        settings, mixer: Mixer, client, django_assert_num_queries,
+        post_with_published_location):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse('blog:index')
+    etag = client.get(url)['ETag']
+    with django_assert_num_queries(0):
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что лента отвечает 304 Not Modified без запросов к БД,"
+        " если она не менялась."
+    )
+
+    mixer.blend(
+        Comment,
+        post=post_with_published_location,
+        author=post_with_published_location.author
+    )
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что новый комментарий меняет ETag ленты."
+    )
+    assert response['ETag'] != etag
+
+
+@pytest.mark.django_db
+def test_post_detail_last_modified(
+        settings, client, user_client, comment_to_a_post):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse('blog:post_detail', args=[comment_to_a_post.post_id])
+    response = client.get(url)
+    last_modified = response['Last-Modified']
+    assert client.get(
+        url, HTTP_IF_MODIFIED_SINCE=last_modified
+    ).status_code == HTTPStatus.NOT_MODIFIED
+    assert user_client.get(url)['ETag'] != response['ETag'], (
+        "Убедитесь, что ETag страницы зависит от пользователя."
+    )
+
+    etag = response['ETag']
+    comment_to_a_post.text = 'Исправленный комментарий'
+    comment_to_a_post.save()
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.OK, (
+        "Убедитесь, что правка комментария меняет ETag страницы поста."
+    )
+
+
+@pytest.mark.django_db
+def test_category_update_changes_etag(
+        settings, client, post_with_published_location):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    category = post_with_published_location.category
+    url = reverse('blog:category_posts', args=[category.slug])
+    etag = client.get(url)['ETag']
+    category.description = 'Новое описание'
+    category.save()
+    assert client.get(
+        url, HTTP_IF_NONE_MATCH=etag
+    ).status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_cached_page_keeps_validators(client, post_with_published_location):
+    url = reverse('blog:post_detail', args=[post_with_published_location.id])
+    etag = client.get(url)['ETag']
+    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+    assert response['X-Page-Cache'] == 'HIT'
+    assert response.status_code == HTTPStatus.NOT_MODIFIED, (
+        "Убедитесь, что страница из кеша тоже отвечает 304 Not Modified."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_changes_when_post_leaves_it(
+        settings, mixer: Mixer, client, post_with_published_location):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse('blog:index')
+    yesterday = timezone.now() - timedelta(days=1)
+    for post in (post_with_published_location, mixer.blend(
+        'blog.Post', is_published=True,
+        category=post_with_published_location.category
+    )):
+        post.pub_date = yesterday
+        post.save()
+    response = client.get(url)
+    assert not response.has_header('Last-Modified'), (
+        "Убедитесь, что лента не отдаёт Last-Modified: он не меняется,"
+        " когда пост пропадает из ленты."
+    )
+    etag = response['ETag']
+    post_with_published_location.delete()
+    response = client.get(
+        url, HTTP_IF_NONE_MATCH=etag,
+        HTTP_IF_MODIFIED_SINCE='Fri, 01 Jan 2100 00:00:00 GMT'
+    )
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что удаление поста из ленты меняет её ETag."
+    )
+
+
+@pytest.mark.django_db
+def test_recount_comments_resets_caches(
+        mixer: Mixer, client, post_with_published_location):
+    post = post_with_published_location
+    mixer.cycle(2).blend(Comment, post=post, author=post.author)
+    Post.objects.filter(pk=post.pk).update(comment_count=10)
+    feed_url = reverse('blog:index')
+    detail_url = reverse('blog:post_detail', args=[post.pk])
+    assert 'Комментарии (10)' in client.get(feed_url).content.decode('utf-8')
+    etag = client.get(detail_url)['ETag']
+    assert get_post_detail(post.pk).comment_count == 10
+
+    call_command('recount_comments', stdout=StringIO())
+    assert 'Комментарии (2)' in client.get(feed_url).content.decode('utf-8'), (
+        "Убедитесь, что после recount_comments лента из кеша выводит"
+        " исправленное число комментариев."
+    )
+    assert get_post_detail(post.pk).comment_count == 2, (
+        "Убедитесь, что recount_comments сбрасывает закешированный пост."
+    )
+    response = client.get(detail_url, HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что recount_comments меняет ETag страницы поста."
+    )
+
+
+@pytest.mark.django_db
+def test_resync_visibility_resets_caches(
+        client, post_with_published_location):
+    post = post_with_published_location
+    feed_url = reverse('blog:index')
+    detail_url = reverse('blog:post_detail', args=[post.pk])
+    assert post.title in client.get(feed_url).content.decode('utf-8')
+    assert client.get(detail_url).status_code == HTTPStatus.OK
+
+    # Снятие с публикации в обход сигналов: кеши остаются прежними.
+    Post.objects.filter(pk=post.pk).update(is_published=False)
+    call_command('publish_scheduled', full=True, stdout=StringIO())
+    assert post.title not in client.get(feed_url).content.decode('utf-8'), (
+        "Убедитесь, что после publish_scheduled --full скрытый пост"
+        " пропадает из ленты в кеше."
+    )
+    assert client.get(detail_url).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что после publish_scheduled --full страница скрытого"
+        " поста не отдаётся из кеша."
+    )
+
+    Post.objects.filter(pk=post.pk).update(is_published=True)
+    call_command('publish_scheduled', full=True, stdout=StringIO())
+    assert post.title in client.get(feed_url).content.decode('utf-8'), (
+        "Убедитесь, что после publish_scheduled --full возвращённый пост"
+        " появляется в ленте."
+    )
+    assert client.get(detail_url).status_code == HTTPStatus.OK
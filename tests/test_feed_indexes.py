@@ -0,0 +1,42 @@
+import re
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+FULL_SCAN = re.compile(r'SCAN (TABLE )?blog_(post|comment)\b(?!.*USING)')
+
+
+def _full_scans(sql):
+    with connection.cursor() as cursor:
+        cursor.execute(f'EXPLAIN QUERY PLAN {sql}')
+        return [row[-1] for row in cursor.fetchall()
+                if FULL_SCAN.search(row[-1])]
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'sqlite',
+    reason='План запроса разбирается в формате SQLite.'
+)
+@pytest.mark.django_db
+def test_feed_queries_use_indexes(
+        user_client, many_posts_with_published_locations, comment_to_a_post):
+    post = many_posts_with_published_locations[0]
+    urls = (
+        reverse('blog:index'),
+        reverse('blog:index') + '?page=2',
+        reverse('blog:category_posts', args=[post.category.slug]),
+        reverse('blog:profile', args=[post.author.username]),
+        reverse('blog:post_detail', args=[comment_to_a_post.post_id]),
+    )
+    for url in urls:
+        with CaptureQueriesContext(connection) as context:
+            user_client.get(url)
+        for query in context.captured_queries:
+            sql = query['sql']
+            if not sql.startswith('SELECT') or 'blog_' not in sql:
+                continue
+            assert not _full_scans(sql), (
+                f'Запрос страницы `{url}` читает таблицу целиком: {sql}'
+            )
@@ -0,0 +1,85 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from conftest import N_PER_PAGE
+
+
+def _walk(client, url, direction_attr, cursor=None):
+    seen = []
+    response = client.get(url, {'cursor': cursor} if cursor else {})
+    while True:
+        page = response.context['page_obj']
+        seen.append([post.id for post in page])
+        if direction_attr == 'previous_cursor':
+            seen.insert(0, seen.pop())
+        cursor = getattr(page, direction_attr)
+        if not cursor:
+            return seen
+        response = client.get(url, {'cursor': cursor})
+        assert response.status_code == HTTPStatus.OK
+
+
+@pytest.mark.django_db
+def test_cursor_walk_matches_offset_pages(
+        client, many_posts_with_published_locations):
+    url = reverse('blog:index')
+    pages = _walk(client, url, 'next_cursor')
+    assert [len(ids) for ids in pages] == [N_PER_PAGE, N_PER_PAGE], (
+        "Убедитесь, что переход по курсору возвращает следующую страницу"
+        " ленты."
+    )
+    second_page = client.get(url, {'page': 2}).context['page_obj']
+    assert pages[1] == [post.id for post in second_page]
+
+    last_cursor = second_page.paginator.last_cursor
+    assert _walk(client, url, 'previous_cursor', last_cursor) == pages, (
+        "Убедитесь, что по курсорам можно пройти ленту в обратном порядке."
+    )
+
+
+@pytest.mark.django_db
+def test_invalid_cursor_is_404(client):
+    response = client.get(reverse('blog:index'), {'cursor': 'broken'})
+    assert response.status_code == HTTPStatus.NOT_FOUND
+
+
+@pytest.mark.django_db
+def test_feed_count_is_cached_and_invalidated(
+        settings, client, django_assert_num_queries,
+        many_posts_with_published_locations):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse('blog:index')
+    assert client.get(url).context['page_obj'].paginator.count == len(
+        many_posts_with_published_locations)
+    with django_assert_num_queries(1):
+        client.get(url)
+
+    post = many_posts_with_published_locations[0]
+    post.is_published = False
+    post.save()
+    assert client.get(url).context['page_obj'].paginator.count == len(
+        many_posts_with_published_locations) - 1, (
+        "Убедитесь, что количество постов в ленте пересчитывается после"
+        " снятия поста с публикации."
+    )
+
+
+@pytest.mark.django_db
+def test_category_page_steady_state_is_one_query(
+        settings, client, django_assert_num_queries,
+        many_posts_with_published_locations):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    category = many_posts_with_published_locations[0].category
+    url = reverse('blog:category_posts', args=[category.slug])
+    client.get(url)
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.context['category'] == category
+
+    category.is_published = False
+    category.save()
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что снятая с публикации категория не берётся из кеша."
+    )
@@ -0,0 +1,38 @@
+import pytest
+from django.http import Http404
+from django.test import RequestFactory
+from django.urls import reverse
+
+from core.identity_map import get_identity_map
+
+
+@pytest.mark.django_db
+def test_identity_map_loads_object_once(
+        django_assert_num_queries, user, another_user):
+    request = RequestFactory().get('/')
+    request.user = user
+    identity_map = get_identity_map(request)
+    model = type(another_user)
+
+    with django_assert_num_queries(0):
+        assert identity_map.get_object_or_404(
+            model, username=user.username) is user
+    with django_assert_num_queries(1):
+        found = identity_map.get_object_or_404(
+            model, username=another_user.username)
+    with django_assert_num_queries(0):
+        assert identity_map.get_object_or_404(model, pk=found.pk) is found
+        assert get_identity_map(request) is identity_map
+    with pytest.raises(Http404):
+        identity_map.get_object_or_404(model, username='missing')
+
+
+@pytest.mark.django_db
+def test_own_profile_does_not_refetch_user(
+        user_client, user, post_with_published_location,
+        django_assert_num_queries):
+    url = reverse('blog:profile', args=[user.username])
+    user_client.get(url)
+    # сессия, пользователь запроса и страница ленты
+    with django_assert_num_queries(3):
+        user_client.get(url)
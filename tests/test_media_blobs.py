@@ -0,0 +1,214 @@
+import os
+from io import BytesIO
+from unittest import mock
+
+import pytest
+from django.core.files.base import ContentFile
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+from mixer.backend.django import Mixer
+from PIL import Image
+
+from blog.models import MediaBlob, Post
+from core.images import variant_name
+from core.storage import ContentAddressedStorage, media_storage
+
+
+def make_image(color, name='upload.jpg'):
+    img_io = BytesIO()
+    Image.new('RGB', (30, 30), color=color).save(img_io, format='JPEG')
+    return ImageFile(img_io, name=name)
+
+
+def refcount(name):
+    return MediaBlob.objects.get(name=name).refcount
+
+
+@pytest.mark.django_db
+def test_identical_uploads_share_one_file(mixer: Mixer):
+    first = mixer.blend(Post, image=make_image((1, 2, 3), 'a.jpg'))
+    second = mixer.blend(Post, image=make_image((1, 2, 3), 'b.jpg'))
+    assert first.image.name == second.image.name, (
+        "Убедитесь, что одинаковые изображения хранятся одним файлом."
+    )
+    assert refcount(first.image.name) == 2
+
+    shared = first.image.name
+    second = Post.objects.get(pk=second.pk)
+    second.image = make_image((200, 0, 0))
+    second.save()
+    assert refcount(shared) == 1, (
+        "Убедитесь, что при замене изображения освобождается ссылка"
+        " на прежний файл."
+    )
+    assert refcount(second.image.name) == 1
+
+    Post.objects.get(pk=first.pk).delete()
+    assert refcount(shared) == 0
+    assert first.image.storage.exists(shared)
+
+
+@pytest.mark.django_db
+def test_gc_media_blobs(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((9, 8, 7)))
+    name = post.image.name
+    storage = post.image.storage
+    post.delete()
+
+    call_command('gc_media_blobs', dry_run=True)
+    assert storage.exists(name)
+    call_command('gc_media_blobs')
+    assert not storage.exists(name), (
+        "Убедитесь, что команда gc_media_blobs удаляет файлы без ссылок."
+    )
+    assert not MediaBlob.objects.filter(name=name).exists()
+
+
+@pytest.mark.django_db
+def test_gc_media_removes_unreferenced_files(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((5, 6, 7)))
+    storage = post.image.storage
+    kept = [
+        post.image.name,
+        variant_name(post.image.name, 'card'),
+        variant_name(post.image.name, 'card', '.webp'),
+    ]
+    orphans = [
+        'posts_images/legacy_orphan.png',
+        'posts_images/legacy_orphan.detail.webp',
+    ]
+    for name in kept[1:] + orphans:
+        storage.save(name, ContentFile(b'data'))
+
+    call_command('gc_media', grace_period=0, dry_run=True)
+    assert all(storage.exists(name) for name in orphans)
+    call_command('gc_media')
+    assert all(storage.exists(name) for name in orphans), (
+        "Убедитесь, что gc_media не удаляет только что загруженные файлы."
+    )
+
+    call_command('gc_media', grace_period=0)
+    assert not any(storage.exists(name) for name in orphans), (
+        "Убедитесь, что gc_media удаляет файлы, на которые не ссылается"
+        " ни один пост."
+    )
+    assert all(storage.exists(name) for name in kept), (
+        "Убедитесь, что gc_media не удаляет изображения постов"
+        " и их уменьшенные копии."
+    )
+    for name in kept[1:]:
+        storage.delete(name)
+
+
+def test_racing_identical_saves_share_name(tmp_path):
+    storage = ContentAddressedStorage(location=tmp_path)
+    storage.save('ab/abc.jpg', ContentFile(b'data'))
+    # Обе загрузки прошли проверку exists() до записи файла.
+    with mock.patch.object(storage, 'exists', return_value=False):
+        name = storage.save('ab/abc.jpg', ContentFile(b'data'))
+    assert name == 'ab/abc.jpg', (
+        "Убедитесь, что параллельная загрузка того же содержимого"
+        " получает то же имя файла."
+    )
+    assert os.listdir(tmp_path / 'ab') == ['abc.jpg']
+
+
+@pytest.mark.django_db
+def test_upload_is_referenced_before_file_is_written(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((4, 4, 4)))
+    name = post.image.name
+    post.delete()
+    counts = []
+    exists = media_storage.exists
+
+    def checked_exists(file_name):
+        if file_name == name:
+            counts.append(refcount(file_name))
+        return exists(file_name)
+
+    with mock.patch.object(media_storage, 'exists', checked_exists):
+        post = mixer.blend(Post, image=make_image((4, 4, 4)))
+    assert post.image.name == name
+    assert counts and counts[0] == 1, (
+        "Убедитесь, что ссылка на файл берётся до того, как хранилище"
+        " решает, записывать ли его."
+    )
+    assert refcount(name) == 1
+
+
+@pytest.mark.django_db
+def test_collect_blob_keeps_referenced_file(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((3, 3, 3)))
+    name = post.image.name
+    post.delete()
+    # Новая загрузка сослалась на файл после того, как сборщик выбрал его.
+    MediaBlob.change_refcount(name, 1)
+    assert not MediaBlob.collect(name)
+    assert media_storage.exists(name), (
+        "Убедитесь, что сборщик не удаляет файл, на который успела"
+        " сослаться новая загрузка."
+    )
+    MediaBlob.change_refcount(name, -1)
+    assert MediaBlob.collect(name)
+    assert not media_storage.exists(name)
+
+
+@pytest.mark.django_db
+def test_gc_media_respects_blob_references(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((2, 2, 2)))
+    name = post.image.name
+    variant = variant_name(name, 'card', '.webp')
+    media_storage.save(variant, ContentFile(b'data'))
+    post.delete()
+
+    # Незавершённая загрузка того же содержимого уже сослалась на файл.
+    MediaBlob.change_refcount(name, 1)
+    call_command('gc_media', grace_period=0)
+    assert media_storage.exists(name) and media_storage.exists(variant), (
+        "Убедитесь, что gc_media не удаляет файл, на который ссылается"
+        " незавершённая загрузка."
+    )
+
+    MediaBlob.change_refcount(name, -1)
+    call_command('gc_media', grace_period=0)
+    assert not media_storage.exists(name)
+    assert not media_storage.exists(variant)
+    assert not MediaBlob.objects.filter(name=name).exists()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_failed_save_releases_reference(mixer: Mixer):
+    post = mixer.blend(Post, image=make_image((6, 6, 6)))
+    name = post.image.name
+    author = post.author
+    post.delete()
+
+    def unsaved_post():
+        # Без автора INSERT нарушает NOT NULL после записи файла.
+        return Post(
+            title='Пост', text='Текст', pub_date=timezone.now(),
+            image=make_image((6, 6, 6))
+        )
+
+    failed = unsaved_post()
+    with pytest.raises(IntegrityError):
+        failed.save()
+    assert refcount(name) == 0, (
+        "Убедитесь, что ссылка на файл снимается, если пост не удалось"
+        " сохранить."
+    )
+    with pytest.raises(IntegrityError), transaction.atomic():
+        unsaved_post().save()
+    assert refcount(name) == 0, (
+        "Убедитесь, что ссылка на файл не остаётся после отката"
+        " транзакции, в которой сохранялся пост."
+    )
+
+    failed.author = author
+    failed.save()
+    assert refcount(name) == 1, (
+        "Убедитесь, что повторное сохранение после ошибки берёт"
+        " одну ссылку на файл."
+    )
@@ -0,0 +1,280 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+from unittest import mock
+from urllib.parse import quote
+
+import pytest
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.test import override_settings
+from PIL import Image
+
+from blog.constants import RESIZE_MAX_SIZE
+from blog.models import Post
+from core.images import variant_name
+from core import resize
+from core.resize import (
+    RESIZE_BYTES_KEY, evict_resized, get_resized, render_resized,
+    resized_name, resized_url
+)
+
+
+def media_url(post):
+    return f'/media/{post.image.name}'
+
+
+def set_visible(post, is_visible):
+    Post.objects.filter(pk=post.pk).update(
+        is_published=is_visible, is_visible=is_visible,
+        pub_date=post.created_at
+    )
+
+
+@pytest.mark.django_db
+def test_media_served_with_validators(post_with_published_location, client):
+    post = post_with_published_location
+    set_visible(post, True)
+    with post.image.open('rb') as file:
+        content = file.read()
+
+    response = client.get(media_url(post))
+    assert response.status_code == 200
+    assert b''.join(response.streaming_content) == content, (
+        "Убедитесь, что по адресу media/ отдаётся файл изображения поста."
+    )
+    assert 'public' in response['Cache-Control']
+    assert response['Accept-Ranges'] == 'bytes'
+
+    response = client.get(
+        media_url(post), HTTP_IF_NONE_MATCH=response['ETag']
+    )
+    assert response.status_code == 304, (
+        "Убедитесь, что на запрос с актуальным If-None-Match"
+        " возвращается статус 304."
+    )
+
+
+@pytest.mark.django_db
+def test_media_range_requests(post_with_published_location, client):
+    post = post_with_published_location
+    set_visible(post, True)
+    with post.image.open('rb') as file:
+        content = file.read()
+    size = len(content)
+
+    response = client.get(media_url(post), HTTP_RANGE='bytes=0-9')
+    assert response.status_code == 206, (
+        "Убедитесь, что на запрос с заголовком Range возвращается"
+        " статус 206."
+    )
+    assert b''.join(response.streaming_content) == content[:10]
+    assert response['Content-Range'] == f'bytes 0-9/{size}'
+    assert response['Content-Length'] == '10'
+
+    response = client.get(media_url(post), HTTP_RANGE='bytes=-5')
+    assert b''.join(response.streaming_content) == content[-5:]
+
+    response = client.get(
+        media_url(post), HTTP_RANGE='bytes=0-9', HTTP_IF_RANGE='"stale"'
+    )
+    assert response.status_code == 200, (
+        "Убедитесь, что при устаревшем If-Range отдаётся весь файл."
+    )
+    response.close()
+
+    response = client.get(media_url(post), HTTP_RANGE=f'bytes={size}-')
+    assert response.status_code == 416
+
+
+@pytest.mark.django_db
+def test_media_of_hidden_post(
+        post_with_published_location, client, user_client,
+        another_user_client):
+    post = post_with_published_location
+    set_visible(post, False)
+    assert client.get(media_url(post)).status_code == 404, (
+        "Убедитесь, что изображение скрытого поста недоступно"
+        " неаутентифицированному пользователю."
+    )
+    assert another_user_client.get(media_url(post)).status_code == 404
+    response = user_client.get(media_url(post))
+    assert response.status_code == 200, (
+        "Убедитесь, что автор видит изображение своего скрытого поста."
+    )
+    assert 'private' in response['Cache-Control']
+    response.close()
+    assert client.get('/media/other/file.txt').status_code == 404
+
+
+@pytest.mark.django_db
+def test_media_access_by_variant_name(
+        post_with_published_location, client, django_assert_num_queries):
+    post = post_with_published_location
+    set_visible(post, True)
+    name = variant_name(post.image.name, 'card', '.webp')
+    post.image.storage.save(name, ContentFile(b'data'))
+    with mock.patch('blog.views.publish_due_posts') as publish:
+        with django_assert_num_queries(1):
+            response = client.get(f'/media/{name}')
+    assert response.status_code == 200, (
+        "Убедитесь, что копия изображения видимого поста в другом формате"
+        " доступна по адресу media/."
+    )
+    response.close()
+    assert not publish.called, (
+        "Убедитесь, что для изображения видимого поста отложенные"
+        " публикации не проверяются."
+    )
+
+    Post.objects.filter(pk=post.pk).update(is_visible=False)
+    assert client.get(f'/media/{name}').status_code == 200, (
+        "Убедитесь, что изображение поста, дата публикации которого"
+        " наступила, становится доступным."
+    )
+    assert Post.objects.get(pk=post.pk).is_visible
+
+    set_visible(post, False)
+    assert client.get(f'/media/{name}').status_code == 404, (
+        "Убедитесь, что копия изображения скрытого поста недоступна."
+    )
+    post.image.storage.delete(name)
+
+
+@pytest.mark.django_db
+def test_media_handed_off_to_front_server(
+        post_with_published_location, client):
+    post = post_with_published_location
+    set_visible(post, True)
+    with override_settings(MEDIA_ACCEL_REDIRECT='/protected/'):
+        response = client.get(media_url(post))
+    assert response.status_code == 200
+    assert response['X-Accel-Redirect'] == f'/protected/{post.image.name}', (
+        "Убедитесь, что с MEDIA_ACCEL_REDIRECT тело файла отдаёт nginx."
+    )
+    assert response.content == b''
+    with override_settings(MEDIA_X_SENDFILE=True):
+        response = client.get(media_url(post))
+    assert response['X-Sendfile'] == post.image.path
+
+
+@pytest.mark.django_db
+def test_resized_media(post_with_published_location, client):
+    post = post_with_published_location
+    set_visible(post, True)
+    url = resized_url(post.image.name, 40, 20)
+
+    response = client.get(url)
+    assert response.status_code == 200, (
+        "Убедитесь, что по подписанному адресу media/resize/ отдаётся"
+        " копия изображения."
+    )
+    with Image.open(BytesIO(b''.join(response.streaming_content))) as image:
+        assert image.width <= 40 and image.height <= 20, (
+            "Убедитесь, что копия вписана в запрошенный размер."
+        )
+    cached = os.path.join(
+        settings.MEDIA_ROOT, resized_name(post.image.name, 40, 20)
+    )
+    mtime = os.stat(cached).st_mtime
+    again = client.get(url)
+    again.close()
+    assert again['ETag'] == response['ETag']
+    assert os.stat(cached).st_mtime == mtime, (
+        "Убедитесь, что повторный запрос отдаёт копию из кеша."
+    )
+
+    assert client.get(url.replace('40x20', '41x20')).status_code == 404, (
+        "Убедитесь, что копии без верной подписи не создаются."
+    )
+    huge = resized_url(post.image.name, RESIZE_MAX_SIZE + 1, 20)
+    assert client.get(huge).status_code == 404
+    os.remove(cached)
+
+
+@pytest.mark.django_db
+def test_resized_media_cache_budget(post_with_published_location, client):
+    post = post_with_published_location
+    set_visible(post, True)
+    names = [resized_name(post.image.name, size, size) for size in (30, 50)]
+    with override_settings(MEDIA_RESIZE_CACHE_BYTES=1):
+        for size in (30, 50):
+            client.get(resized_url(post.image.name, size, size)).close()
+    assert not os.path.exists(os.path.join(settings.MEDIA_ROOT, names[0])), (
+        "Убедитесь, что кеш копий не превышает MEDIA_RESIZE_CACHE_BYTES."
+    )
+    os.remove(os.path.join(settings.MEDIA_ROOT, names[1]))
+
+
+@pytest.mark.django_db
+def test_resize_requests_collapsed(post_with_published_location):
+    post = post_with_published_location
+    with mock.patch(
+        'core.resize.render_resized', wraps=render_resized
+    ) as render:
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            names = set(pool.map(
+                lambda _: get_resized(
+                    post.image.path, post.image.name, 25, 25, 80
+                ),
+                range(8)
+            ))
+    assert render.call_count == 1, (
+        "Убедитесь, что одновременные запросы одной копии создают её"
+        " один раз."
+    )
+    assert not resize._locks, (
+        "Убедитесь, что блокировки отрисовки удаляются после запросов."
+    )
+    os.remove(os.path.join(settings.MEDIA_ROOT, names.pop()))
+
+
+@pytest.mark.django_db
+def test_resize_cache_size_tracked(post_with_published_location):
+    post = post_with_published_location
+    cache.set(RESIZE_BYTES_KEY, 0, None)
+    with mock.patch(
+        'core.resize.evict_resized', wraps=evict_resized
+    ) as evict:
+        name = get_resized(post.image.path, post.image.name, 35, 35, 80)
+    fullpath = os.path.join(settings.MEDIA_ROOT, name)
+    assert not evict.called, (
+        "Убедитесь, что каталог копий не обходится, пока объём кеша"
+        " не превысил MEDIA_RESIZE_CACHE_BYTES."
+    )
+    assert cache.get(RESIZE_BYTES_KEY) == os.path.getsize(fullpath), (
+        "Убедитесь, что объём новой копии учитывается в кеше."
+    )
+    os.remove(fullpath)
+
+
+@pytest.mark.django_db
+def test_media_with_non_ascii_name(post_with_published_location, client):
+    post = post_with_published_location
+    storage = post.image.storage
+    name = storage.save('posts_images/Фото 1.jpg', ContentFile(b'jpeg'))
+    variant = storage.save('posts_images/Фото 1.card.webp', ContentFile(b'w'))
+    Post.objects.filter(pk=post.pk).update(image=name)
+    set_visible(post, True)
+
+    with override_settings(MEDIA_ACCEL_REDIRECT='/protected/'):
+        response = client.get(f'/media/{name}')
+    assert response['X-Accel-Redirect'] == (
+        f'/protected/{quote(name)}'
+    ), (
+        "Убедитесь, что путь в X-Accel-Redirect закодирован для URI."
+    )
+    with override_settings(MEDIA_X_SENDFILE=True):
+        response = client.get(f'/media/{name}')
+    assert not response.has_header('X-Sendfile')
+    assert b''.join(response.streaming_content) == b'jpeg'
+
+    response = client.get(f'/media/{variant}')
+    assert response.status_code == 200, (
+        "Убедитесь, что копия в другом формате доступна по имени"
+        " оригинала."
+    )
+    response.close()
+    storage.delete(name)
+    storage.delete(variant)
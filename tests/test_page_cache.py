@@ -0,0 +1,131 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import Mixer
+
+from blog.middleware import get_page_cache_stats
+from blog.models import Comment
+from core.pagination import encode_cursor
+
+
+@pytest.mark.django_db
+def test_anonymous_pages_are_cached(
+        client, post_with_published_location, django_assert_num_queries):
+    url = reverse('blog:post_detail', args=[post_with_published_location.id])
+    assert client.get(url)['X-Page-Cache'] == 'MISS'
+    with django_assert_num_queries(0):
+        response = client.get(url)
+    assert response['X-Page-Cache'] == 'HIT', (
+        "Убедитесь, что повторный запрос страницы неаутентифицированным"
+        " посетителем обслуживается из кеша."
+    )
+    assert get_page_cache_stats() == (1, 1)
+
+
+@pytest.mark.django_db
+def test_page_cache_invalidation(
+        mixer: Mixer, client, post_with_published_location):
+    post = post_with_published_location
+    detail_url = reverse('blog:post_detail', args=[post.id])
+    index_url = reverse('blog:index')
+    about_url = reverse('pages:about')
+    for url in (detail_url, index_url, about_url):
+        client.get(url)
+
+    mixer.blend(Comment, post=post, author=post.author)
+    assert client.get(detail_url)['X-Page-Cache'] == 'MISS', (
+        "Убедитесь, что новый комментарий сбрасывает кеш страницы поста."
+    )
+    assert client.get(index_url)['X-Page-Cache'] == 'MISS'
+    assert client.get(about_url)['X-Page-Cache'] == 'HIT'
+
+    post.location.name = 'Новое место'
+    post.location.save()
+    assert client.get(about_url)['X-Page-Cache'] == 'MISS'
+
+
+@pytest.mark.django_db
+def test_authenticated_pages_are_not_cached(user_client):
+    url = reverse('blog:index')
+    user_client.get(url)
+    assert 'X-Page-Cache' not in user_client.get(url)
+
+
+@pytest.mark.django_db
+def test_shared_shell_is_personalized(
+        settings, user, another_user, user_client, another_user_client,
+        client, post_with_published_location):
+    settings.PAGE_CACHE_SHARED_SHELL = True
+    post = post_with_published_location
+    url = reverse('blog:post_detail', args=[post.id])
+    edit_url = reverse('blog:edit_post', args=[post.id])
+
+    response = another_user_client.get(url)
+    assert response['X-Page-Cache'] == 'MISS'
+    content = response.content.decode('utf-8')
+    assert another_user.username in content
+    assert edit_url not in content
+
+    response = user_client.get(url)
+    assert response['X-Page-Cache'] == 'HIT', (
+        "Убедитесь, что общая копия страницы отдаётся из кеша"
+        " и аутентифицированным пользователям."
+    )
+    content = response.content.decode('utf-8')
+    assert edit_url in content and 'csrfmiddlewaretoken' in content, (
+        "Убедитесь, что в страницу из кеша подставляются кнопки автора"
+        " и форма комментария текущего пользователя."
+    )
+    assert '<!--personal:' not in content
+
+    response = client.get(url)
+    assert response['X-Page-Cache'] == 'HIT'
+    content = response.content.decode('utf-8')
+    assert user.username not in content.split('</header>')[0]
+    assert edit_url not in content and 'csrfmiddlewaretoken' not in content
+
+
+@pytest.mark.django_db
+def test_own_profile_is_not_shared(settings, user, user_client, client):
+    settings.PAGE_CACHE_SHARED_SHELL = True
+    url = reverse('blog:profile', args=[user.username])
+    client.get(url)
+    assert 'X-Page-Cache' not in user_client.get(url), (
+        "Убедитесь, что владелец профиля не получает общую копию"
+        " своей страницы."
+    )
+
+
+@pytest.mark.django_db
+def test_fragment_endpoint(user, user_client, post_with_published_location):
+    post = post_with_published_location
+    url = reverse('blog:fragment', args=['post_controls'])
+    response = user_client.get(
+        url, {'post_id': post.id, 'author_id': user.id}
+    )
+    assert reverse('blog:edit_post', args=[post.id]) in (
+        response.content.decode('utf-8')
+    )
+    assert 'private' in response['Cache-Control']
+    assert user_client.get(
+        reverse('blog:fragment', args=['unknown'])
+    ).status_code == 404
+    assert user_client.get(url).status_code == 404
+
+
+@pytest.mark.django_db
+def test_comments_format_does_not_depend_on_accept(
+        client, post_with_published_location):
+    url = reverse(
+        'blog:post_comments', args=[post_with_published_location.id]
+    ) + f'?cursor={encode_cursor(None)}'
+    response = client.get(url, HTTP_ACCEPT='application/json')
+    assert response['Content-Type'].startswith('text/html')
+    response = client.get(url, HTTP_ACCEPT='text/html')
+    assert response['X-Page-Cache'] == 'HIT'
+    assert response['Content-Type'].startswith('text/html'), (
+        "Убедитесь, что из кеша страниц не отдаётся JSON на запрос HTML:"
+        " формат подгрузки комментариев задаётся параметром format."
+    )
+    response = client.get(f'{url}&format=json')
+    assert response['X-Page-Cache'] == 'MISS'
+    assert response['Content-Type'] == 'application/json'
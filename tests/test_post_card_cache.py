@@ -0,0 +1,44 @@
+import pytest
+from django.urls import reverse
+from mixer.backend.django import Mixer
+
+from blog.models import Comment, Post
+
+
+@pytest.mark.django_db
+def test_card_version_tracks_card_content(
+        mixer: Mixer, post_with_published_location):
+    post = post_with_published_location
+    version = Post.objects.get(pk=post.pk).card_version
+    assert Post.objects.get(pk=post.pk).card_version == version
+
+    mixer.blend(Comment, post=post, author=post.author)
+    assert Post.objects.get(pk=post.pk).card_version != version, (
+        "Убедитесь, что версия карточки поста меняется при добавлении"
+        " комментария."
+    )
+    version = Post.objects.get(pk=post.pk).card_version
+    post.category.title = 'Новая категория'
+    post.category.save()
+    assert Post.objects.get(pk=post.pk).card_version != version, (
+        "Убедитесь, что версия карточки поста меняется при изменении"
+        " категории."
+    )
+
+
+@pytest.mark.django_db
+def test_cached_cards_are_shared_between_feeds(
+        user_client, post_with_published_location):
+    post = post_with_published_location
+    user_client.get(reverse('blog:index'))
+    response = user_client.get(
+        reverse('blog:category_posts', args=[post.category.slug]))
+    assert post.title in response.content.decode('utf-8')
+
+    post.title = 'Изменённый заголовок'
+    post.save()
+    response = user_client.get(reverse('blog:index'))
+    assert 'Изменённый заголовок' in response.content.decode('utf-8'), (
+        "Убедитесь, что после изменения поста его карточка в ленте"
+        " обновляется."
+    )
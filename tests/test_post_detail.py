@@ -0,0 +1,83 @@
+from http import HTTPStatus
+
+import pytest
+from django.urls import reverse
+
+from blog.constants import COMMENTS_PAGINATOR_COUNT
+from blog.models import Comment
+
+
+@pytest.mark.django_db
+def test_detail_post_is_loaded_once(
+        settings, client, comment_to_a_post, django_assert_num_queries):
+    settings.PAGE_CACHE_TIMEOUT = 0
+    url = reverse('blog:post_detail', args=[comment_to_a_post.post_id])
+    client.get(url)
+    # пост берётся из кеша, остаётся запрос комментариев
+    with django_assert_num_queries(1):
+        response = client.get(url)
+    assert response.context['post'].comment_count == 1
+
+
+@pytest.mark.django_db
+def test_detail_visibility_after_cached_edit(
+        client, user_client, post_with_published_location):
+    post = post_with_published_location
+    url = reverse('blog:post_detail', args=[post.id])
+    assert client.get(url).status_code == HTTPStatus.OK
+
+    post.is_published = False
+    post.save()
+    assert client.get(url).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что снятый с публикации пост не берётся из кеша."
+    )
+    assert user_client.get(url).status_code == HTTPStatus.OK, (
+        "Убедитесь, что автор видит свой снятый с публикации пост."
+    )
+
+
+@pytest.mark.django_db
+def test_comments_are_paginated(
+        mixer, client, post_with_published_location):
+    post = post_with_published_location
+    per_page = COMMENTS_PAGINATOR_COUNT
+    comments = mixer.cycle(per_page + 5).blend(Comment, post=post)
+
+    response = client.get(reverse('blog:post_detail', args=[post.id]))
+    page = response.context['comments']
+    assert [c.id for c in page] == [c.id for c in comments[:per_page]], (
+        "Убедитесь, что на странице поста выводится только первая порция"
+        " комментариев."
+    )
+    more_url = reverse('blog:post_comments', args=[post.id])
+    assert more_url in response.content.decode('utf-8')
+
+    fragment = client.get(more_url, {'cursor': page.next_cursor})
+    assert [c.id for c in fragment.context['comments']] == [
+        c.id for c in comments[per_page:]]
+    assert 'data-load-more' not in fragment.content.decode('utf-8')
+
+    data = client.get(
+        more_url, {'cursor': page.next_cursor, 'format': 'json'}).json()
+    assert len(data['comments']) == 5 and data['next_cursor'] is None
+
+
+@pytest.mark.django_db
+def test_comments_without_cursor(
+        mixer, client, post_with_published_location):
+    post = post_with_published_location
+    comments = mixer.cycle(3).blend(Comment, post=post)
+    more_url = reverse('blog:post_comments', args=[post.id])
+
+    response = client.get(more_url)
+    assert response.status_code == HTTPStatus.OK, (
+        "Убедитесь, что запрос комментариев без курсора возвращает"
+        " первую порцию, а не 404."
+    )
+    assert [c.id for c in response.context['comments']] == [
+        c.id for c in comments]
+    assert client.get(
+        more_url, {'cursor': 'broken'}
+    ).status_code == HTTPStatus.NOT_FOUND, (
+        "Убедитесь, что для неверного курсора возвращается 404."
+    )
@@ -0,0 +1,57 @@
+from importlib import import_module
+
+import pytest
+from django.apps import apps
+from django.template import Context, Template
+from django.urls import reverse
+
+from blog.models import Post
+
+TEXT = (
+    'Первое второе третье четвёртое пятое шестое седьмое восьмое'
+    ' девятое десятое одиннадцатое двенадцатое'
+)
+
+
+def truncatewords(text):
+    return Template('{{ text|truncatewords:10 }}').render(
+        Context({'text': text}, autoescape=False)
+    )
+
+
+@pytest.mark.django_db
+def test_excerpt_matches_truncatewords(post_with_published_location):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    assert Post.objects.get(pk=post.pk).excerpt == truncatewords(TEXT), (
+        "Убедитесь, что анонс поста совпадает с результатом фильтра"
+        " truncatewords:10."
+    )
+
+    post.text = 'Короткий текст после правки'
+    post.save()
+    assert Post.objects.get(pk=post.pk).excerpt == post.text, (
+        "Убедитесь, что анонс обновляется при редактировании поста."
+    )
+
+
+@pytest.mark.django_db
+def test_migration_fills_excerpt(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text=TEXT, excerpt='')
+    migration = import_module('blog.migrations.0013_post_excerpt')
+    migration.fill_excerpt(apps, None)
+    assert Post.objects.get(pk=post.pk).excerpt == truncatewords(TEXT), (
+        "Убедитесь, что миграция заполняет анонсы существующих постов."
+    )
+
+
+@pytest.mark.django_db
+def test_feed_defers_post_text(client, post_with_published_location):
+    response = client.get(reverse('blog:index'))
+    posts = list(response.context['page_obj'])
+    assert posts, "Убедитесь, что пост выводится в ленте."
+    assert all('text' in post.get_deferred_fields() for post in posts), (
+        "Убедитесь, что лента не загружает полный текст постов."
+    )
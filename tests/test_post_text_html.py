@@ -0,0 +1,50 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+from django.urls import reverse
+
+from blog.models import Post
+
+TEXT = 'Первая строка <b>\nВторая строка'
+HTML = 'Первая строка &lt;b&gt;<br>Вторая строка'
+
+
+@pytest.mark.django_db
+def test_text_html_follows_edits(client, post_with_published_location):
+    post = post_with_published_location
+    post.text = TEXT
+    post.save()
+    assert Post.objects.get(pk=post.pk).text_html == HTML, (
+        "Убедитесь, что при сохранении поста его текст записывается"
+        " в text_html экранированным, с переносами строк <br>."
+    )
+
+    post.text = 'Текст после правки'
+    post.save()
+    assert Post.objects.get(pk=post.pk).text_html == post.text, (
+        "Убедитесь, что text_html обновляется при редактировании поста."
+    )
+    response = client.get(reverse('blog:post_detail', args=[post.pk]))
+    assert 'Текст после правки' in response.content.decode('utf-8')
+
+
+@pytest.mark.django_db
+def test_render_post_bodies_fills_empty_rows(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text=TEXT, text_html='')
+    call_command('render_post_bodies', stdout=StringIO())
+    assert Post.objects.get(pk=post.pk).text_html == HTML, (
+        "Убедитесь, что команда render_post_bodies заполняет пустой"
+        " text_html существующих постов."
+    )
+
+
+@pytest.mark.django_db
+def test_text_as_html_fallback(post_with_published_location):
+    post = post_with_published_location
+    Post.objects.filter(pk=post.pk).update(text=TEXT, text_html='')
+    assert Post.objects.get(pk=post.pk).text_as_html == HTML, (
+        "Убедитесь, что для поста без text_html текст выводится"
+        " экранированным, с переносами строк <br>."
+    )
@@ -0,0 +1,54 @@
+import pytest
+from mixer.backend.django import Mixer
+
+from blog.models import Post
+from blog.publication import next_publication_time, publish_scheduled_posts
+
+
+def _is_visible(post):
+    return Post.objects.values_list('is_visible', flat=True).get(pk=post.pk)
+
+
+@pytest.mark.django_db
+def test_visibility_follows_post_and_category(
+        mixer: Mixer, post_with_published_location):
+    post = post_with_published_location
+    assert _is_visible(post), (
+        "Убедитесь, что опубликованный пост опубликованной категории"
+        " помечается видимым."
+    )
+
+    post.category.is_published = False
+    post.category.save()
+    assert not _is_visible(post), (
+        "Убедитесь, что снятие категории с публикации скрывает её посты."
+    )
+
+    post.category.is_published = True
+    post.category.save()
+    post.is_published = False
+    post.save()
+    assert not _is_visible(post)
+
+    post.is_published = True
+    post.save()
+    post.category.delete()
+    assert not _is_visible(post), (
+        "Убедитесь, что посты удалённой категории скрываются."
+    )
+
+
+@pytest.mark.django_db
+def test_scheduled_posts_are_published(future_posts):
+    first = min(future_posts, key=lambda post: post.pub_date)
+    assert not any(_is_visible(post) for post in future_posts)
+    assert next_publication_time() == first.pub_date, (
+        "Убедитесь, что планировщик знает время ближайшей публикации."
+    )
+
+    assert publish_scheduled_posts(now=first.pub_date) == 1
+    assert _is_visible(first), (
+        "Убедитесь, что отложенный пост становится видимым, когда наступает"
+        " дата его публикации."
+    )
+    assert next_publication_time() > first.pub_date
@@ -0,0 +1,153 @@
+from io import BytesIO, StringIO
+from unittest import mock
+
+import pytest
+from django.core.files.images import ImageFile
+from django.core.management import call_command
+from django.urls import reverse
+from django.templatetags.static import static
+from PIL import Image
+
+from blog.constants import IMAGE_PLACEHOLDER, THUMBNAIL_SIZES
+from blog.models import ImageJob, Post
+from core.images import variant_name
+
+
+@pytest.mark.django_db
+def test_uploaded_image_is_processed_by_job(post_with_published_location):
+    post = post_with_published_location
+    job = ImageJob.objects.get(post=post)
+    assert job.status == ImageJob.Status.PENDING, (
+        "Убедитесь, что загруженное изображение ставится в очередь"
+        " обработки."
+    )
+    assert post.card_image_url == static(IMAGE_PLACEHOLDER), (
+        "Убедитесь, что до обработки изображения выводится заглушка."
+    )
+
+    call_command('process_image_jobs')
+    job.refresh_from_db()
+    assert job.status == ImageJob.Status.DONE
+    image = post.image
+    for variant, size in THUMBNAIL_SIZES.items():
+        name = variant_name(image.name, variant)
+        assert image.storage.exists(name), (
+            "Убедитесь, что обработка изображения создаёт его уменьшенные"
+            " копии."
+        )
+        with Image.open(image.storage.path(name)) as thumbnail:
+            assert thumbnail.width <= size[0]
+            assert thumbnail.height <= size[1]
+    post.refresh_from_db()
+    assert post.card_image_url.endswith(variant_name(image.name, 'card'))
+
+
+@pytest.mark.django_db(transaction=True)
+def test_job_strips_exif(post_with_published_location):
+    img = Image.new('RGB', (40, 20))
+    exif = Image.Exif()
+    exif[0x0112] = 6  # повёрнуто на 90°
+    img_io = BytesIO()
+    img.save(img_io, format='JPEG', exif=exif)
+    post = post_with_published_location
+    post.image = ImageFile(img_io, name='exif_image.jpg')
+    post.save()
+
+    post.refresh_from_db()
+    with Image.open(post.image.path) as stored:
+        assert not stored.getexif(), (
+            "Убедитесь, что из оригинала изображения удаляются EXIF-данные."
+        )
+        assert stored.size == (20, 40)
+
+
+@pytest.mark.django_db
+def test_failed_jobs_are_retried(post_with_published_location):
+    job = ImageJob.objects.get(post=post_with_published_location)
+    job.status = ImageJob.Status.FAILED
+    job.save()
+    call_command('process_image_jobs')
+    job.refresh_from_db()
+    assert job.status == ImageJob.Status.FAILED
+    call_command('process_image_jobs', retry=True)
+    job.refresh_from_db()
+    assert job.status == ImageJob.Status.DONE, (
+        "Убедитесь, что команда process_image_jobs --retry повторяет"
+        " задачи с ошибкой."
+    )
+
+
+@pytest.mark.django_db
+def test_make_thumbnails_command(post_with_published_location):
+    post = post_with_published_location
+    name = variant_name(post.image.name, 'detail')
+    call_command('make_thumbnails')
+    assert post.image.storage.exists(name), (
+        "Убедитесь, что команда make_thumbnails создаёт недостающие копии."
+    )
+
+
+@pytest.mark.django_db
+def test_post_picture_markup(client, post_with_published_location):
+    post = post_with_published_location
+    call_command('process_image_jobs')
+    assert post.image.storage.exists(
+        variant_name(post.image.name, 'card', '.webp')
+    ), "Убедитесь, что для изображения создаются копии в WebP."
+
+    content = client.get(reverse('blog:index')).content.decode('utf-8')
+    assert '<source type="image/webp"' in content, (
+        "Убедитесь, что в карточке поста изображение выводится в <picture>"
+        " с копиями в WebP."
+    )
+    assert 'loading="lazy"' in content and 'width="100"' in content
+    content = client.get(
+        reverse('blog:post_detail', args=[post.id])
+    ).content.decode('utf-8')
+    assert 'srcset=' in content and 'loading="lazy"' not in content
+
+
+@pytest.mark.django_db
+def test_image_meta_is_stored_on_upload(post_with_published_location):
+    post = post_with_published_location
+    post.refresh_from_db()
+    meta = post.image_meta
+    assert (meta['width'], meta['height']) == (100, 100), (
+        "Убедитесь, что при загрузке изображения сохраняются его размеры."
+    )
+    assert meta['mime'] == 'image/jpeg'
+    assert meta['size'] == post.image.size
+    assert len(meta['sha256']) == 64
+
+
+@pytest.mark.django_db
+def test_backfill_image_meta(post_with_published_location):
+    post = post_with_published_location
+    call_command('process_image_jobs')
+    post.refresh_from_db()
+    expected = post.image_meta
+    type(post).objects.filter(pk=post.pk).update(image_meta={})
+    call_command('backfill_image_meta', workers=2)
+    post.refresh_from_db()
+    assert post.image_meta == expected, (
+        "Убедитесь, что команда backfill_image_meta восстанавливает"
+        " сведения об изображении и его копиях."
+    )
+
+
+@pytest.mark.django_db
+def test_backfill_image_meta_in_batches(mixer, post_with_published_location):
+    for color in ((1, 1, 1), (2, 2, 2)):
+        img_io = BytesIO()
+        Image.new('RGB', (20, 20), color=color).save(img_io, format='JPEG')
+        mixer.blend(Post, image=ImageFile(img_io, name='batch.jpg'))
+    Post.objects.update(image_meta={})
+    with mock.patch.object(
+        Post.objects, 'bulk_update', wraps=Post.objects.bulk_update
+    ) as bulk_update:
+        call_command('backfill_image_meta', batch_size=2, stdout=StringIO())
+    assert bulk_update.call_count == 2, (
+        "Убедитесь, что backfill_image_meta записывает сведения"
+        " порциями по --batch-size постов."
+    )
+    assert not Post.objects.exclude(image_meta__has_key='sha256').exists()